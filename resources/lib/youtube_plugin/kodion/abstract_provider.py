@@ -11,6 +11,7 @@
 from __future__ import absolute_import, division, unicode_literals
 
 import re
+from operator import itemgetter
 
 from .constants import CHECK_SETTINGS, CONTENT, PATHS, REROUTE_PATH
 from .exceptions import KodionException
@@ -31,6 +32,13 @@ class AbstractProvider(object):
 
     # map for regular expression (path) to method (names)
     _dict_path = {}
+    # (regular expression, method) routes of _dict_path, in the same order,
+    # keyed by the first path segment that they can match. Routes that can
+    # match any path are included for every segment and keyed by None.
+    # Rebuilt when first used after a path is registered.
+    _route_index = None
+    # leading literal path segment of an anchored regular expression
+    _segment_re = re.compile(r'\^/([a-zA-Z0-9_-]+)(?:/|\$)')
 
     def __init__(self):
         # register some default paths
@@ -103,6 +111,7 @@ class AbstractProvider(object):
                     return None
 
             cls._dict_path[re.compile(re_path, re.UNICODE)] = func
+            AbstractProvider._route_index = None
             return method
 
         if method:
@@ -143,9 +152,45 @@ class AbstractProvider(object):
         # can be overridden by the derived class
         return []
 
+    @classmethod
+    def _build_route_index(cls):
+        segment_routes = {}
+        any_routes = []
+        for order, route in enumerate(cls._dict_path.items()):
+            segment = cls._segment_re.match(route[0].pattern)
+            if segment:
+                segment_routes.setdefault(segment.group(1), []).append(
+                    (order, route)
+                )
+            else:
+                any_routes.append((order, route))
+
+        route_index = {
+            segment: tuple(route for _, route in sorted(
+                routes + any_routes, key=itemgetter(0)
+            ))
+            for segment, routes in segment_routes.items()
+        }
+        route_index[None] = tuple(route for _, route in any_routes)
+        AbstractProvider._route_index = route_index
+        return route_index
+
+    @classmethod
+    def get_routes(cls, path):
+        """
+        Returns the (regular expression, method) routes that can match path,
+        in the order they were registered
+        """
+        route_index = cls._route_index or cls._build_route_index()
+        if path.startswith('/'):
+            routes = route_index.get(path.split('/', 2)[1])
+            if routes is not None:
+                return routes
+        return route_index[None]
+
     def navigate(self, context):
         path = context.get_path()
-        for re_path, handler in self._dict_path.items():
+        for re_path, handler in self.get_routes(path):
             re_match = re_path.search(path)
             if not re_match:
                 continue
@@ -9,7 +9,9 @@
 
 __all__ = (
     'BaseHTTPRequestHandler',
+    'Queue',
     'TCPServer',
+    'ThreadingMixIn',
     'byte_string_type',
     'cpu_count',
     'datetime_infolabel',
@@ -35,8 +37,9 @@ __all__ = (
 try:
     from html import unescape
     from http.server import BaseHTTPRequestHandler
-    from socketserver import TCPServer
+    from socketserver import TCPServer, ThreadingMixIn
     from os import cpu_count
+    from queue import Queue
     from urllib.parse import (
         parse_qs,
         parse_qsl,
@@ -65,7 +68,8 @@ except ImportError:
     from BaseHTTPServer import BaseHTTPRequestHandler
     from contextlib import contextmanager as _contextmanager
     from multiprocessing import cpu_count
-    from SocketServer import TCPServer
+    from Queue import Queue
+    from SocketServer import TCPServer, ThreadingMixIn
     from urllib import (
         quote as _quote,
         unquote as _unquote,
@@ -73,6 +73,7 @@ CONTENT_TYPE = 'content_type'
 DEVELOPER_CONFIGS = 'configs'
 LICENSE_TOKEN = 'license_token'
 LICENSE_URL = 'license_url'
+PLAYER_CLIENT_STATS = 'player-client-stats'
 PLAYER_DATA = 'player_json'
 PLAYLIST_PATH = 'playlist_path'
 PLAYLIST_POSITION = 'playlist_position'
@@ -129,6 +130,7 @@ __all__ = (
     'DEVELOPER_CONFIGS',
     'LICENSE_TOKEN',
     'LICENSE_URL',
+    'PLAYER_CLIENT_STATS',
     'PLAYER_DATA',
     'PLAYLIST_PATH',
     'PLAYLIST_POSITION',
@@ -28,6 +28,7 @@ SUBTITLE_DOWNLOAD = 'kodion.subtitle.download'  # (bool)
 
 ITEMS_PER_PAGE = 'kodion.content.max_per_page'  # (int)
 HIDE_VIDEOS = 'youtube.view.hide_videos'  # (list[string])
+SUBSCRIPTIONS_BACKGROUND_REFRESH = 'youtube.subscriptions.background_refresh'  # (bool)
 
 SAFE_SEARCH = 'kodion.safe.search'  # (int)
 AGE_GATE = 'kodion.age.gate'  # (bool)
@@ -36,18 +37,21 @@ API_CONFIG_PAGE = 'youtube.api.config.page'  # (bool)
 API_KEY = 'youtube.api.key'  # (string)
 API_ID = 'youtube.api.id'  # (string)
 API_SECRET = 'youtube.api.secret'  # (string)
+API_QUOTA = 'youtube.api.quota'  # (int)
 ALLOW_DEV_KEYS = 'youtube.allow.dev.keys'  # (bool)
 
 WATCH_LATER_PLAYLIST = 'youtube.folder.watch_later.playlist'  # (str)
 HISTORY_PLAYLIST = 'youtube.folder.history.playlist'  # (str)
 
 CLIENT_SELECTION = 'youtube.client.selection'  # (int)
+CLIENT_RACE = 'youtube.client.race'  # (int)
 SUPPORT_ALTERNATIVE_PLAYER = 'kodion.support.alternative_player'  # (bool)
 DEFAULT_PLAYER_WEB_URLS = 'kodion.default_player.web_urls'  # (bool)
 ALTERNATIVE_PLAYER_WEB_URLS = 'kodion.alternative_player.web_urls'  # (bool)
 ALTERNATIVE_PLAYER_ADAPTIVE = 'kodion.alternative_player.adaptive'  # (bool)
 
 USE_ISA = 'kodion.video.quality.isa'  # (bool)
+PRE_RESOLVE_NEXT = 'youtube.play.pre_resolve_next'  # (bool)
 LIVE_STREAMS = 'kodion.live_stream.selection'  # (int)
 
 USE_LOCAL_HISTORY = 'kodion.history.local'  # (bool)
@@ -77,6 +81,7 @@ PLAY_COUNT_MIN_PERCENT = 'kodion.play_count.percent'  # (int)
 VERIFY_SSL = 'requests.ssl.verify'  # (bool)
 CONNECT_TIMEOUT = 'requests.timeout.connect'  # (int)
 READ_TIMEOUT = 'requests.timeout.read'  # (int)
+CONCURRENT_REQUESTS = 'requests.concurrent'  # (int)
 
 HTTPD_PORT = 'kodion.http.port'  # (number)
 HTTPD_LISTEN = 'kodion.http.listen'  # (string)
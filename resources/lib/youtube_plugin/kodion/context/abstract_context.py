@@ -29,16 +29,18 @@ from ..sql_store import (
     FeedHistory,
     FunctionCache,
     PlaybackHistory,
+    QuotaLedger,
     SearchHistory,
     WatchLaterList,
 )
-from ..utils import current_system_version
+from ..utils import ThreadPool, current_system_version
 
 
 class AbstractContext(object):
     _initialized = False
     _addon = None
     _settings = None
+    _thread_pool = None
 
     _BOOL_PARAMS = {
         PLAY_FORCE_AUDIO,
@@ -124,6 +126,7 @@ class AbstractContext(object):
         self._feed_history = None
         self._function_cache = None
         self._playback_history = None
+        self._quota_ledger = None
         self._search_history = None
         self._watch_later_list = None
 
@@ -193,6 +196,13 @@ class AbstractContext(object):
             )
         return self._function_cache
 
+    def get_quota_ledger(self):
+        uuid = self.get_uuid()
+        if not self._quota_ledger or self._quota_ledger.uuid != uuid:
+            filepath = (self.get_data_path(), uuid, 'quota.sqlite')
+            self._quota_ledger = QuotaLedger(filepath)
+        return self._quota_ledger
+
     def get_search_history(self):
         uuid = self.get_uuid()
         if not self._search_history or self._search_history.uuid != uuid:
@@ -217,6 +227,15 @@ class AbstractContext(object):
             self._watch_later_list = WatchLaterList(filepath)
         return self._watch_later_list
 
+    @staticmethod
+    def get_thread_pool():
+        """
+        Returns the worker thread pool shared by all contexts in this process
+        """
+        if not AbstractContext._thread_pool:
+            AbstractContext._thread_pool = ThreadPool(name='Worker')
+        return AbstractContext._thread_pool
+
     def get_uuid(self):
         uuid = self._uuid
         if uuid:
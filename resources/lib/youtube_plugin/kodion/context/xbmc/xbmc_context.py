@@ -73,6 +73,7 @@ class XbmcContext(AbstractContext):
         'client.ip': 30700,
         'client.ip.failed': 30701,
         'client.secret.incorrect': 30650,
+        'client.stats': 30822,
         'content.clear': 30121,
         'content.clear.confirm': 30120,
         'content.delete': 30116,
@@ -162,6 +163,8 @@ class XbmcContext(AbstractContext):
         'please_wait': 30119,
         'prompt': 30566,
         'purchases': 30622,
+        'quota.low': 30819,
+        'quota.usage': 30818,
         'recommendations': 30551,
         'refresh': 30543,
         'related_videos': 30514,
@@ -593,6 +596,7 @@ class XbmcContext(AbstractContext):
         new_context._feed_history = self._feed_history
         new_context._function_cache = self._function_cache
         new_context._playback_history = self._playback_history
+        new_context._quota_ledger = self._quota_ledger
         new_context._search_history = self._search_history
         new_context._watch_later_list = self._watch_later_list
 
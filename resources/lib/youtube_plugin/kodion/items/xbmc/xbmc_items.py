@@ -727,7 +727,7 @@ def video_listitem(context,
             play_count=int(not video_item.get_play_count()),
             played_time=0.0,
             played_percent=0,
-        ))
+        ), defer=True)
 
     context_menu = video_item.get_context_menu()
     if context_menu:
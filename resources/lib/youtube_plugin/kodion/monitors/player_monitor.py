@@ -23,6 +23,7 @@ from ..constants import (
     PLAY_WITH,
     REFRESH_CONTAINER,
 )
+from ..utils import find_video_id
 
 
 class PlayerMonitorThread(threading.Thread):
@@ -45,10 +46,70 @@ class PlayerMonitorThread(threading.Thread):
         self.current_time = 0.0
         self.total_time = 0.0
         self.progress = 0
+        self.next_video_id = None
 
         self.daemon = True
         self.start()
 
+    def prepare_next_item(self):
+        """
+        Resolves the streams of the next item in the playlist, in the
+        background, so that they are cached and ready to be used by the plugin
+        when the next item is played. Only done once per upcoming item, unless
+        the next item changes.
+        """
+        playlist = xbmc.PlayList(xbmc.PLAYLIST_VIDEO)
+        position = playlist.getposition() + 1
+        if not 0 < position < playlist.size():
+            return
+
+        path = playlist[position].getPath()
+        if not self._context.is_plugin_path(path, PATHS.PLAY):
+            return
+        video_id = find_video_id(path)
+        if (not video_id
+                or video_id == self.video_id
+                or video_id == self.next_video_id):
+            return
+
+        self.next_video_id = video_id
+
+        # manifests are held in memory by the HTTP server
+        monitor = self._monitor
+        if not monitor.httpd and monitor.httpd_required():
+            monitor.start_httpd()
+
+        # the client and resource manager are resolved in this thread rather
+        # than in the thread pool worker
+        try:
+            client = self._provider.get_client(self._context)
+            resource_manager = self._provider.get_resource_manager(
+                self._context
+            )
+        except Exception as exc:
+            self._context.log_error('PlayerMonitorThread[{0}]: Failed to'
+                                    ' prepare [{1}] - {exc}'
+                                    .format(self.video_id, video_id, exc=exc))
+            return
+        self._context.get_thread_pool().submit(self._prepare_video,
+                                               client,
+                                               resource_manager,
+                                               video_id)
+
+    def _prepare_video(self, client, resource_manager, video_id):
+        self._context.log_debug('PlayerMonitorThread[{0}]: Preparing next'
+                                ' playlist item [{1}]'
+                                .format(self.video_id, video_id))
+        try:
+            client.get_video_streams(self._context, video_id)
+            resource_manager.get_videos((video_id,),
+                                        live_details=True,
+                                        suppress_errors=True)
+        except Exception as exc:
+            self._context.log_error('PlayerMonitorThread[{0}]: Failed to'
+                                    ' prepare [{1}] - {exc}'
+                                    .format(self.video_id, video_id, exc=exc))
+
     def abort_now(self):
         return (not self._player.isPlaying()
                 or self._context.abort_requested()
@@ -102,6 +163,7 @@ class PlayerMonitorThread(threading.Thread):
 
         access_manager = self._context.get_access_manager()
         settings = self._context.get_settings()
+        pre_resolve_next = settings.pre_resolve_next()
 
         video_id_param = 'video_id=%s' % self.video_id
         report_url = use_remote_history and playback_stats.get('watchtime_url')
@@ -145,6 +207,11 @@ class PlayerMonitorThread(threading.Thread):
             if waited >= report_period:
                 waited = 0
 
+                # Checked periodically, after playback of the current item has
+                # started, in case the playlist is changed while playing
+                if pre_resolve_next:
+                    self.prepare_next_item()
+
                 last_state = state
                 if played_time == report_time:
                     state = 'paused'
@@ -404,6 +471,22 @@ class PlayerMonitor(xbmc.Player):
         self.onPlayBackEnded()
 
     def onPlayBackError(self):
+        # Cached streams of the failed video may be invalid, so remove them to
+        # ensure that streams are resolved again when next played
+        video_ids = {
+            thread.video_id
+            for thread in self.threads
+            if not thread.ended()
+        }
+        playback_data = self._ui.get_property(PLAYER_DATA)
+        if playback_data:
+            video_ids.add(json.loads(playback_data).get('video_id'))
+        video_ids.discard(None)
+        if video_ids:
+            client = self._provider.get_client(self._context)
+            for video_id in video_ids:
+                client.clear_video_streams(self._context, video_id)
+
         self.onPlayBackEnded()
 
     def onPlayBackSeek(self, time, seekOffset):
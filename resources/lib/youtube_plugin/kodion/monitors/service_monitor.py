@@ -42,6 +42,9 @@ class ServiceMonitor(xbmc.Monitor):
         self.httpd = None
         self.httpd_thread = None
         self.httpd_sleep_allowed = True
+        # the server is started and stopped from the service loop, from
+        # notification handlers, and from thread pool workers
+        self._httpd_lock = threading.RLock()
 
         self.refresh = False
         self.interrupt = False
@@ -161,27 +164,31 @@ class ServiceMonitor(xbmc.Monitor):
         self._old_httpd_port = self._httpd_port
 
     def start_httpd(self):
-        if self.httpd:
-            return
+        with self._httpd_lock:
+            if self.httpd:
+                return
 
-        log_debug('HTTPServer: Starting |{ip}:{port}|'
-                  .format(ip=self._httpd_address, port=self._httpd_port))
-        self.httpd_address_sync()
-        self.httpd = get_http_server(address=self._httpd_address,
-                                     port=self._httpd_port,
-                                     context=self._context)
-        if not self.httpd:
-            return
+            log_debug('HTTPServer: Starting |{ip}:{port}|'
+                      .format(ip=self._httpd_address, port=self._httpd_port))
+            self.httpd_address_sync()
+            httpd = get_http_server(address=self._httpd_address,
+                                    port=self._httpd_port,
+                                    context=self._context)
+            if not httpd:
+                return
 
-        self.httpd_thread = threading.Thread(target=self.httpd.serve_forever)
-        self.httpd_thread.start()
+            self.httpd_thread = threading.Thread(target=httpd.serve_forever)
+            self.httpd_thread.start()
+            self.httpd = httpd
 
-        address = self.httpd.socket.getsockname()
-        log_debug('HTTPServer: Serving on |{ip}:{port}|'
-                  .format(ip=address[0], port=address[1]))
+            address = httpd.socket.getsockname()
+            log_debug('HTTPServer: Serving on |{ip}:{port}|'
+                      .format(ip=address[0], port=address[1]))
 
     def shutdown_httpd(self, sleep=False):
-        if self.httpd:
+        with self._httpd_lock:
+            if not self.httpd:
+                return
             if sleep and self.httpd_required(while_sleeping=True):
                 return
             log_debug('HTTPServer: Shutting down |{ip}:{port}|'
@@ -195,13 +202,15 @@ class ServiceMonitor(xbmc.Monitor):
             self.httpd = None
 
     def restart_httpd(self):
-        log_debug('HTTPServer: Restarting |{old_ip}:{old_port}| > |{ip}:{port}|'
-                  .format(old_ip=self._old_httpd_address,
-                          old_port=self._old_httpd_port,
-                          ip=self._httpd_address,
-                          port=self._httpd_port))
-        self.shutdown_httpd()
-        self.start_httpd()
+        with self._httpd_lock:
+            log_debug('HTTPServer: Restarting'
+                      ' |{old_ip}:{old_port}| > |{ip}:{port}|'
+                      .format(old_ip=self._old_httpd_address,
+                              old_port=self._old_httpd_port,
+                              ip=self._httpd_address,
+                              port=self._httpd_port))
+            self.shutdown_httpd()
+            self.start_httpd()
 
     def ping_httpd(self):
         return self.httpd and httpd_status(self._context)
@@ -13,7 +13,9 @@ from .http_server import (
     get_client_ip_address,
     get_connect_address,
     get_http_server,
+    has_manifest,
     httpd_status,
+    store_manifest,
 )
 from .ip_api import Locator
 from .requests import BaseRequestsClass, InvalidJSONError
@@ -23,7 +25,9 @@ __all__ = (
     'get_client_ip_address',
     'get_connect_address',
     'get_http_server',
+    'has_manifest',
     'httpd_status',
+    'store_manifest',
     'BaseRequestsClass',
     'InvalidJSONError',
     'Locator',
@@ -10,30 +10,38 @@
 from __future__ import absolute_import, division, unicode_literals
 
 import json
-import os
 import re
 import socket
-from io import open
+from hashlib import md5
 from textwrap import dedent
 
 from .requests import BaseRequestsClass
 from ..compatibility import (
     BaseHTTPRequestHandler,
     TCPServer,
+    ThreadingMixIn,
     parse_qs,
     urlsplit,
     xbmc,
     xbmcgui,
-    xbmcvfs,
 )
-from ..constants import ADDON_ID, LICENSE_TOKEN, LICENSE_URL, PATHS, TEMP_PATH
+from ..constants import ADDON_ID, LICENSE_TOKEN, LICENSE_URL, PATHS
 from ..logger import log_debug, log_error
+from ..sql_store.memory_cache import MemoryCache
 from ..utils import validate_ip_address, redact_ip_from_url, wait
 
 
-class HTTPServer(TCPServer):
+class HTTPServer(ThreadingMixIn, TCPServer):
+    """
+    Handles each connection in a separate thread, so that a slow request,
+    e.g. a license request proxied to a remote server, or an idle keep-alive
+    connection does not block other requests.
+    """
     allow_reuse_address = True
     allow_reuse_port = True
+    daemon_threads = True
+    # Don't wait for open keep-alive connections when shutting down
+    block_on_close = False
 
     def server_close(self):
         try:
@@ -46,8 +54,25 @@ class HTTPServer(TCPServer):
 class RequestHandler(BaseHTTPRequestHandler, object):
     _context = None
     requests = BaseRequestsClass()
-    BASE_PATH = xbmcvfs.translatePath(TEMP_PATH)
+    # DASH manifests generated by the plugin, held in memory by the service
+    # and served from here. Keyed by filename, which includes a hash of the
+    # manifest content, and bounded to 4 MiB, least recently used first.
+    manifests = MemoryCache(max_size_kb=4 * 1024)
+    # Request bodies larger than the manifest cache are rejected unread
+    max_content_length = 4 * 1024 * 1024
     chunk_size = 1024 * 64
+    # Allow connections to be kept alive between requests. All responses must
+    # then include a Content-Length header, or close the connection.
+    protocol_version = 'HTTP/1.1'
+    # Socket timeout in seconds, after which a stalled request or idle
+    # keep-alive connection is closed
+    timeout = 30
+    # Headers of proxied responses that only apply to the upstream connection
+    hop_by_hop_headers = frozenset((
+        'connection',
+        'keep-alive',
+        'transfer-encoding',
+    ))
     local_ranges = (
         ((10, 0, 0, 0), (10, 255, 255, 255)),
         ((172, 16, 0, 0), (172, 31, 255, 255)),
@@ -111,23 +136,17 @@ class RequestHandler(BaseHTTPRequestHandler, object):
             self.wfile.write(client_json.encode('utf-8'))
 
         elif stripped_path.startswith(PATHS.MPD):
-            filepath = os.path.join(self.BASE_PATH, self.path[len(PATHS.MPD):])
-            file_chunk = True
-            try:
-                with open(filepath, 'rb') as f:
-                    self.send_response(200)
-                    self.send_header('Content-Type', 'application/dash+xml')
-                    self.send_header('Content-Length',
-                                     str(os.path.getsize(filepath)))
-                    self.end_headers()
-                    while file_chunk:
-                        file_chunk = f.read(self.chunk_size)
-                        if file_chunk:
-                            self.wfile.write(file_chunk)
-            except IOError:
-                response = ('File Not Found: |{path}| -> |{filepath}|'
-                            .format(path=self.path, filepath=filepath))
-                self.send_error(404, response)
+            manifest = self.get_manifest()
+            if manifest:
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/dash+xml')
+                self.send_header('Content-Length', str(len(manifest)))
+                self.end_headers()
+                for chunk in self.get_chunks(manifest):
+                    self.wfile.write(chunk)
+            else:
+                self.send_error(404, 'Manifest Not Found: |{path}|'
+                                .format(path=self.path))
 
         elif api_config_enabled and stripped_path == PATHS.API:
             html = self.api_config_page()
@@ -208,6 +227,7 @@ class RequestHandler(BaseHTTPRequestHandler, object):
                 wait(1)
                 self.send_response(301)
                 self.send_header('Location', url[0])
+                self.send_header('Content-Length', '0')
                 self.end_headers()
             else:
                 self.send_error(501)
@@ -223,17 +243,15 @@ class RequestHandler(BaseHTTPRequestHandler, object):
             self.send_error(403)
 
         elif self.path.startswith(PATHS.MPD):
-            filepath = os.path.join(self.BASE_PATH, self.path[len(PATHS.MPD):])
-            if not os.path.isfile(filepath):
-                response = ('File Not Found: |{path}| -> |{filepath}|'
-                            .format(path=self.path, filepath=filepath))
-                self.send_error(404, response)
-            else:
+            manifest = self.get_manifest()
+            if manifest:
                 self.send_response(200)
                 self.send_header('Content-Type', 'application/dash+xml')
-                self.send_header('Content-Length',
-                                 str(os.path.getsize(filepath)))
+                self.send_header('Content-Length', str(len(manifest)))
                 self.end_headers()
+            else:
+                self.send_error(404, 'Manifest Not Found: |{path}|'
+                                .format(path=self.path))
 
         elif self.path.startswith(PATHS.REDIRECT):
             self.send_error(404)
@@ -248,6 +266,22 @@ class RequestHandler(BaseHTTPRequestHandler, object):
         if not self.connection_allowed():
             self.send_error(403)
 
+        elif self.path.startswith(PATHS.MPD):
+            filename = self.path[len(PATHS.MPD):]
+            length = self.get_content_length()
+            if length is None:
+                return
+            if not length or not re.match(r'^[\w-]+\.[0-9a-f]+\.mpd$',
+                                          filename):
+                self.send_error(400)
+                return
+            manifest = self.rfile.read(length)
+            self.manifests.set((filename, 0, manifest, len(manifest)))
+            self.send_response(201)
+            self.send_header('Location', self.path)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
         elif self.path.startswith(PATHS.DRM):
             home = xbmcgui.Window(10000)
 
@@ -263,7 +297,9 @@ class RequestHandler(BaseHTTPRequestHandler, object):
 
             size_limit = None
 
-            length = int(self.headers['Content-Length'])
+            length = self.get_content_length()
+            if length is None:
+                return
             post_data = self.rfile.read(length)
 
             li_headers = {
@@ -319,7 +355,7 @@ class RequestHandler(BaseHTTPRequestHandler, object):
             for header, value in response.headers.items():
                 if re.match('^[Cc]ontent-[Ll]ength$', header):
                     self.send_header(header, str(len(response_body)))
-                else:
+                elif header.lower() not in self.hop_by_hop_headers:
                     self.send_header(header, value)
             self.end_headers()
 
@@ -333,6 +369,27 @@ class RequestHandler(BaseHTTPRequestHandler, object):
     def log_message(self, format, *args):
         return
 
+    def get_content_length(self):
+        """
+        Returns the length of the request body, or None if an error response
+        was sent because the length is invalid or exceeds max_content_length
+        """
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self.send_error(400)
+            return None
+        if length > self.max_content_length:
+            self.send_error(413)
+            return None
+        return length
+
+    def get_manifest(self):
+        row = self.manifests.get(urlsplit(self.path).path[len(PATHS.MPD):])
+        return row[2] if row else None
+
     def get_chunks(self, data):
         for i in range(0, len(data), self.chunk_size):
             yield data[i:i + self.chunk_size]
@@ -592,6 +649,44 @@ def httpd_status(context):
     return False
 
 
+def store_manifest(context, video_id, manifest):
+    """
+    Hands a DASH manifest to the HTTP server running in the service, which
+    holds it in memory. Returns the URL the manifest can be played from, or
+    None if the server could not store it.
+    """
+    manifest = manifest.encode('utf-8')
+    filename = '.'.join((video_id, md5(manifest).hexdigest(), 'mpd'))
+    address, port = get_connect_address(context)
+    url = 'http://{address}:{port}{path}{file}'.format(address=address,
+                                                       port=port,
+                                                       path=PATHS.MPD,
+                                                       file=filename)
+    response = RequestHandler.requests.request(
+        url,
+        method='POST',
+        data=manifest,
+        headers={'Content-Type': 'application/dash+xml'},
+    )
+    result = response and response.status_code
+    if result == 201:
+        return url
+
+    log_error('HTTPServer: Failed to store manifest |{file}| - |{response}|'
+              .format(file=filename, response=result or 'failed'))
+    return None
+
+
+def has_manifest(url):
+    """
+    Checks whether a manifest stored using store_manifest is still held in
+    memory by the HTTP server
+    """
+    response = RequestHandler.requests.request(url, method='HEAD')
+    result = response and response.status_code
+    return result == 200
+
+
 def get_client_ip_address(context):
     ip_address = None
     address, port = get_connect_address(context)
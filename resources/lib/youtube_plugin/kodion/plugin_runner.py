@@ -15,6 +15,7 @@ from platform import python_version
 
 from .context import XbmcContext
 from .plugin import XbmcPlugin
+from .sql_store import Storage
 from ..youtube import Provider
 
 
@@ -60,7 +61,22 @@ def run(context=_context,
                                path=context.get_path(),
                                params=params))
 
-    plugin.run(provider, context, focused=(current_uri == new_uri))
+    # reuse database connections and cached rows for the duration of this
+    # invocation only, and defer non-critical writes until after the listing
+    # has been returned to Kodi
+    Storage.persist_connections()
+    Storage.defer_writes()
+    try:
+        plugin.run(provider, context, focused=(current_uri == new_uri))
+    finally:
+        Storage.defer_writes(False)
+        Storage.persist_connections(False)
+        Storage.clear_memory_caches()
 
     if profiler:
         profiler.print_stats()
+        context.log_debug('Storage: {connections} connections opened,'
+                          ' {pragmas} PRAGMA statements executed,'
+                          ' {memory_hits} memory cache hits,'
+                          ' {memory_misses} memory cache misses'
+                          .format(**Storage.get_stats(reset=True)))
@@ -15,6 +15,7 @@ import socket
 from .compatibility import parse_qsl, urlsplit, xbmc, xbmcaddon, xbmcvfs
 from .constants import (
     DATA_PATH,
+    PLAYER_CLIENT_STATS,
     RELOAD_ACCESS_MANAGER,
     TEMP_PATH,
     WAIT_FLAG,
@@ -126,6 +127,48 @@ def _config_actions(context, action, *_args):
         else:
             ui.show_notification(context.localize('httpd.not.running'))
 
+    elif action == 'quota_usage':
+        limit = settings.api_quota()
+        quota_ledger = context.get_quota_ledger()
+        today = quota_ledger.get_quota_date()
+        lines = []
+        for key_id, date, usage in quota_ledger.get_items():
+            lines.append('{date} - {key_id}: {units}/{limit}'.format(
+                date=ui.bold(date) if date == today else date,
+                key_id=key_id,
+                units=usage['units'],
+                limit=limit,
+            ))
+            if date != today:
+                continue
+            lines.extend([
+                ui.indent(value='{path}: {units}'.format(path=path,
+                                                         units=units))
+                for path, units in sorted(usage['paths'].items(),
+                                          key=lambda item: item[1],
+                                          reverse=True)
+            ])
+        if not lines:
+            lines.append('{date}: 0/{limit}'.format(date=today, limit=limit))
+        ui.on_ok(localize('quota.usage'), ui.new_line().join(lines))
+
+    elif action == 'client_stats':
+        client_stats = context.get_data_cache().get_item(PLAYER_CLIENT_STATS)
+        lines = [
+            '{client}: {successful}/{requests} ({rate:.0%}), {latency:.0f}ms'
+            .format(client=client_name,
+                    successful=successful,
+                    requests=requests,
+                    rate=successful / requests,
+                    latency=1000 * elapsed / requests)
+            for client_name, (requests, successful, elapsed) in sorted(
+                client_stats.items(),
+                key=lambda item: item[1][1] / item[1][0],
+                reverse=True,
+            )
+        ] if client_stats else [localize('none')]
+        ui.on_ok(localize('client.stats'), ui.new_line().join(lines))
+
 
 def _maintenance_actions(context, action, params):
     target = params.get('target')
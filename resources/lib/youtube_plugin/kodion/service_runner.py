@@ -19,6 +19,7 @@ from .constants import (
 )
 from .context import XbmcContext
 from .monitors import PlayerMonitor, ServiceMonitor
+from .sql_store import Storage
 from .utils import rm_dir
 from ..youtube.provider import Provider
 
@@ -26,10 +27,26 @@ from ..youtube.provider import Provider
 __all__ = ('run',)
 
 
+def _refresh_subscription_feeds(client, logged_in, context, period):
+    try:
+        client.refresh_subscription_feeds(logged_in=logged_in, period=period)
+    except Exception as exc:
+        context.log_error('Subscription feed refresh failed: |{exc}|'
+                          .format(exc=exc))
+
+
 def run():
     context = XbmcContext()
     context.log_debug('YouTube service initialization...')
 
+    # reuse database connections for the lifetime of the service, and batch
+    # deferred writes, flushed periodically in the main loop. Rows are not
+    # cached in memory, as writes made by the plugin and script processes
+    # would not be seen by the service
+    Storage.persist_connections()
+    Storage.defer_writes()
+    Storage.cache_in_memory(False)
+
     provider = Provider()
 
     get_infobool = context.get_infobool
@@ -48,17 +65,21 @@ def run():
                            context=context,
                            monitor=monitor)
 
-    # wipe add-on temp folder on updates/restarts (subtitles, and mpd files)
+    # wipe add-on temp folder on updates/restarts (subtitles)
     rm_dir(TEMP_PATH)
 
     plugin_sleeping = False
-    plugin_sleep_timeout = httpd_sleep_timeout = 0
+    plugin_sleep_timeout = httpd_sleep_timeout = feed_refresh_timeout = 0
     ping_period = 60
+    feed_refresh_period = 60
+    feed_refresh_task = None
     loop_num = sub_loop_num = 0
     restart_attempts = 0
     video_id = None
     container = monitor.is_plugin_container()
     while not monitor.abortRequested():
+        Storage.flush_writes()
+
         idle = get_infobool('System.IdleTime(10)')
 
         if idle:
@@ -92,6 +113,31 @@ def run():
                 else:
                     monitor.shutdown_httpd()
 
+        # subscription feeds are refreshed a few at a time, in the background
+        if feed_refresh_timeout >= feed_refresh_period:
+            feed_refresh_timeout = 0
+            if ((not feed_refresh_task or feed_refresh_task.done())
+                    and context.get_settings()
+                    .subscriptions_background_refresh()):
+                # the client is created, or its access token refreshed, in the
+                # main loop rather than in a thread pool worker. The refresh
+                # task then uses its own copy, as the shared client is also
+                # used by the main loop and the player monitor
+                try:
+                    client = provider.get_client(context).copy()
+                except Exception as exc:
+                    client = None
+                    context.log_error('Subscription feed refresh failed:'
+                                      ' |{exc}|'.format(exc=exc))
+                if client:
+                    feed_refresh_task = context.get_thread_pool().submit(
+                        _refresh_subscription_feeds,
+                        client,
+                        provider.is_logged_in(),
+                        context,
+                        feed_refresh_period,
+                    )
+
         while not monitor.abortRequested():
             if container['is_plugin']:
                 wait_interval = 0.1
@@ -140,6 +186,7 @@ def run():
                 monitor.waitForAbort(wait_interval)
                 httpd_sleep_timeout += wait_interval
                 plugin_sleep_timeout += wait_interval
+                feed_refresh_timeout += wait_interval
 
             if loop_num <= 0:
                 break
@@ -157,3 +204,6 @@ def run():
 
     provider.tear_down()
     context.tear_down()
+
+    Storage.defer_writes(False)
+    Storage.persist_connections(False)
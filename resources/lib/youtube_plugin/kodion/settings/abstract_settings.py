@@ -57,6 +57,9 @@ class AbstractSettings(object):
     def open_settings(self):
         raise NotImplementedError()
 
+    def logging_enabled(self):
+        return self._echo
+
     def items_per_page(self, value=None):
         if value is not None:
             return self.set_int(SETTINGS.ITEMS_PER_PAGE, value)
@@ -148,6 +151,17 @@ class AbstractSettings(object):
             return self.set_bool(SETTINGS.USE_ISA, value)
         return self.get_bool(SETTINGS.USE_ISA, False)
 
+    def pre_resolve_next(self, value=None):
+        if value is not None:
+            return self.set_bool(SETTINGS.PRE_RESOLVE_NEXT, value)
+        return self.get_bool(SETTINGS.PRE_RESOLVE_NEXT, False)
+
+    def subscriptions_background_refresh(self, value=None):
+        if value is not None:
+            return self.set_bool(SETTINGS.SUBSCRIPTIONS_BACKGROUND_REFRESH,
+                                 value)
+        return self.get_bool(SETTINGS.SUBSCRIPTIONS_BACKGROUND_REFRESH, False)
+
     def subtitle_download(self):
         return self.get_bool(SETTINGS.SUBTITLE_DOWNLOAD, False)
 
@@ -205,6 +219,9 @@ class AbstractSettings(object):
         read_timout = self.get_int(SETTINGS.READ_TIMEOUT, 27)
         return connect_timeout, read_timout
 
+    def concurrent_requests(self):
+        return self.get_int(SETTINGS.CONCURRENT_REQUESTS, 4)
+
     def allow_dev_keys(self):
         return self.get_bool(SETTINGS.ALLOW_DEV_KEYS, False)
 
@@ -310,6 +327,9 @@ class AbstractSettings(object):
             return new_secret
         return self.get_string(SETTINGS.API_SECRET)
 
+    def api_quota(self):
+        return self.get_int(SETTINGS.API_QUOTA, 10000)
+
     def get_location(self):
         location = self.get_string(SETTINGS.LOCATION, '').replace(' ', '').strip()
         coords = location.split(',')
@@ -425,6 +445,11 @@ class AbstractSettings(object):
             return self.set_int(SETTINGS.CLIENT_SELECTION, value)
         return self.get_int(SETTINGS.CLIENT_SELECTION, 0)
 
+    def client_race(self, value=None):
+        if value is not None:
+            return self.set_int(SETTINGS.CLIENT_RACE, value)
+        return self.get_int(SETTINGS.CLIENT_RACE, 1)
+
     def show_detailed_description(self, value=None):
         if value is not None:
             return self.set_bool(SETTINGS.DETAILED_DESCRIPTION, value)
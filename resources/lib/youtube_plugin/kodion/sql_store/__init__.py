@@ -12,7 +12,9 @@ from .data_cache import DataCache
 from .feed_history import FeedHistory
 from .function_cache import FunctionCache
 from .playback_history import PlaybackHistory
+from .quota_ledger import QuotaLedger
 from .search_history import SearchHistory
+from .storage import Storage
 from .watch_later_list import WatchLaterList
 
 
@@ -22,6 +24,8 @@ __all__ = (
     'FeedHistory',
     'FunctionCache',
     'PlaybackHistory',
+    'QuotaLedger',
     'SearchHistory',
+    'Storage',
     'WatchLaterList',
 )
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""
+
+    Copyright (C) 2024-present plugin.video.youtube
+
+    SPDX-License-Identifier: GPL-2.0-only
+    See LICENSES/GPL-2.0-only for more information.
+"""
+
+from __future__ import absolute_import, division, unicode_literals
+
+import json
+import pickle
+import zlib
+
+try:
+    import lzma
+except ImportError:
+    lzma = None
+
+from ..compatibility import string_type
+
+
+__all__ = (
+    'JSON',
+    'JSON_LZMA',
+    'JSON_ZLIB',
+    'PICKLE',
+    'decode',
+    'encode',
+)
+
+PICKLE = 'pickle'
+JSON = 'json'
+JSON_ZLIB = 'json+zlib'
+JSON_LZMA = 'json+lzma'
+
+# Encoded values are prefixed with a single byte tag identifying the codec
+# used. Pickled values are left untagged, as pickle protocol 2+ output always
+# starts with the PROTO opcode (0x80), which allows existing rows to be read.
+_PICKLE_TAG = b'\x80'
+_TAGS = {
+    JSON: b'\x01',
+    JSON_ZLIB: b'\x02',
+    JSON_LZMA: b'\x03',
+}
+
+# Values smaller than this are stored as plain JSON, as compression would add
+# more overhead than it saves
+_MIN_COMPRESS_SIZE = 256
+
+# Types that are loaded from JSON with the same type and value. Other string
+# types are checked using isinstance
+_JSON_SCALAR_TYPES = frozenset((bool, float, int, type(None), type('')))
+
+
+def _dump_json(obj):
+    return json.dumps(obj,
+                      check_circular=False,
+                      separators=(',', ':')).encode('utf-8')
+
+
+def _load_json(data):
+    return json.loads(bytes(data).decode('utf-8'))
+
+
+def _is_json_safe(obj):
+    """
+    Returns True if obj is made up only of dicts with string keys, lists,
+    strings, numbers, booleans and None, i.e. types that are loaded from JSON
+    unchanged. Tuples, sets and dicts with non-string keys are not.
+    """
+    obj_type = type(obj)
+    if obj_type is not dict and obj_type is not list:
+        return (obj_type in _JSON_SCALAR_TYPES
+                or isinstance(obj, string_type))
+
+    # only containers are added to the stack, as most values are scalars
+    stack = [obj]
+    pop = stack.pop
+    append = stack.append
+    scalar_types = _JSON_SCALAR_TYPES
+    while stack:
+        obj = pop()
+        if type(obj) is dict:
+            for key in obj:
+                if not isinstance(key, string_type):
+                    return False
+            values = obj.values()
+        else:
+            values = obj
+        for value in values:
+            value_type = type(value)
+            if value_type is dict or value_type is list:
+                append(value)
+            elif (value_type not in scalar_types
+                  and not isinstance(value, string_type)):
+                return False
+    return True
+
+
+def _dump_pickle(obj):
+    return pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+_COMPRESSORS = {
+    JSON_ZLIB: lambda data: zlib.compress(data, 6),
+    JSON_LZMA: lambda data: lzma.compress(data),
+}
+
+_DECOMPRESSORS = {
+    _TAGS[JSON]: None,
+    _TAGS[JSON_ZLIB]: zlib.decompress,
+    _TAGS[JSON_LZMA]: lambda data: lzma.decompress(data),
+}
+
+
+def encode(obj, codec=PICKLE):
+    """
+    Serialises obj to bytes using the requested codec. Falls back to pickle
+    if the codec is unavailable or obj cannot be represented as JSON without
+    changing its value or type, e.g. tuples or dicts with non-string keys.
+    """
+    if codec not in _TAGS:
+        return _dump_pickle(obj)
+    if codec == JSON_LZMA and not lzma:
+        codec = JSON_ZLIB
+
+    if not _is_json_safe(obj):
+        return _dump_pickle(obj)
+    try:
+        data = _dump_json(obj)
+    except (TypeError, ValueError):
+        return _dump_pickle(obj)
+
+    if codec != JSON:
+        if len(data) < _MIN_COMPRESS_SIZE:
+            codec = JSON
+        else:
+            data = _COMPRESSORS[codec](data)
+    return _TAGS[codec] + data
+
+
+def decode(blob):
+    tag = bytes(blob[:1])
+    if tag == _PICKLE_TAG or tag not in _DECOMPRESSORS:
+        # protocol 0 and 1 pickles are not prefixed with PROTO opcode
+        return pickle.loads(blob)
+    decompress = _DECOMPRESSORS[tag]
+    if decompress:
+        return _load_json(decompress(blob[1:]))
+    return _load_json(blob[1:])
@@ -10,7 +10,17 @@
 
 from __future__ import absolute_import, division, unicode_literals
 
+import mmap
+import os
+from contextlib import closing
+from hashlib import sha1
+from tempfile import mkstemp
+from time import time
+
+from . import codec
 from .storage import Storage
+from ..logger import log_error
+from ..utils.methods import make_dirs
 
 
 class DataCache(Storage):
@@ -18,11 +28,25 @@ class DataCache(Storage):
     _table_created = False
     _table_updated = False
     _sql = {}
+    _memory_cache_size_kb = 4096
+    _codec = codec.JSON_ZLIB
+
+    # Large values are stored in files named by a hash of their contents,
+    # with only a small index row kept in the database
+    BLOB_PREFIX = 'blob,'
+    BLOB_MAX_AGE = Storage.ONE_MONTH
+    # Files that are not indexed are removed at most once per interval, and
+    # only once unmodified for long enough to not be in the process of being
+    # stored by another process
+    BLOB_PRUNE_KEY = 'blobs_pruned'
+    BLOB_PRUNE_INTERVAL = Storage.ONE_DAY
+    BLOB_PRUNE_MIN_AGE = 10 * Storage.ONE_MINUTE
 
     def __init__(self, filepath, max_file_size_mb=5):
         max_file_size_kb = max_file_size_mb * 1024
         super(DataCache, self).__init__(filepath,
                                         max_file_size_kb=max_file_size_kb)
+        self._blob_dir = os.path.join(os.path.dirname(self._filepath), 'blobs')
 
     def get_items(self,
                   content_ids,
@@ -60,8 +84,11 @@ class DataCache(Storage):
     def set_item(self, content_id, item):
         self._set(content_id, item)
 
-    def set_items(self, items):
-        self._set_many(items)
+    def set_items(self, items, defer=False):
+        self._set_many(items, defer=defer)
+
+    def merge_item(self, content_id, item, merge, defer=False):
+        self._merge(content_id, item, merge, defer=defer)
 
     def del_item(self, content_id):
         self._remove(content_id)
@@ -69,5 +96,101 @@ class DataCache(Storage):
     def update_item(self, content_id, item, timestamp=None):
         self._update(content_id, item, timestamp)
 
+    def refresh_item(self, content_id, timestamp=None):
+        self._update(content_id, timestamp=timestamp)
+
+    def get_blob(self, content_id, seconds=None):
+        """
+        Returns the text stored by set_blob for content_id, read from a memory
+        mapped file, or None if not found or older than seconds
+        """
+        key = self.BLOB_PREFIX + content_id
+        index = self._get(key, seconds=seconds)
+        if not index:
+            return None
+        if not index['size']:
+            return ''
+
+        filepath = os.path.join(self._blob_dir, index['digest'])
+        try:
+            with open(filepath, 'rb') as blob_file, closing(mmap.mmap(
+                    blob_file.fileno(), 0, access=mmap.ACCESS_READ
+            )) as blob:
+                if blob.size() != index['size']:
+                    raise ValueError('Unexpected size')
+                return blob[:].decode('utf-8')
+        except (EnvironmentError, ValueError) as exc:
+            log_error('DataCache.get_blob - Unable to read: |{0}|\n{1!r}'
+                      .format(filepath, exc))
+        self._remove(key)
+        return None
+
+    def set_blob(self, content_id, data):
+        """
+        Stores the text data for content_id in a file named by a hash of its
+        contents. Files that are no longer indexed are periodically removed.
+        """
+        data = data.encode('utf-8')
+        digest = sha1(data).hexdigest()
+        filepath = os.path.join(self._blob_dir, digest)
+
+        if not os.path.isfile(filepath):
+            if not make_dirs(self._blob_dir):
+                return
+            fd, temp_filepath = mkstemp(suffix='.tmp', dir=self._blob_dir)
+            try:
+                with os.fdopen(fd, 'wb') as temp_file:
+                    temp_file.write(data)
+                os.rename(temp_filepath, filepath)
+            except EnvironmentError as exc:
+                try:
+                    os.remove(temp_filepath)
+                except EnvironmentError:
+                    pass
+                # the same contents may have been stored by another process
+                if not os.path.isfile(filepath):
+                    log_error('DataCache.set_blob - Unable to write: |{0}|\n'
+                              '{1!r}'.format(filepath, exc))
+                    return
+
+        self._set(self.BLOB_PREFIX + content_id,
+                  {'digest': digest, 'size': len(data)})
+        if not self._get(self.BLOB_PRUNE_KEY,
+                         seconds=self.BLOB_PRUNE_INTERVAL):
+            self._prune_blobs()
+
+    def _prune_blobs(self):
+        self._set(self.BLOB_PRUNE_KEY, True)
+        index = self.get_items_like(self.BLOB_PREFIX + '%')
+        expired = [key
+                   for key, item in index.items()
+                   if item['age'] > self.BLOB_MAX_AGE]
+        if expired:
+            self._remove_many(expired)
+        in_use = {item['value']['digest']
+                  for key, item in index.items()
+                  if key not in expired}
+
+        try:
+            filenames = os.listdir(self._blob_dir)
+        except EnvironmentError:
+            return
+        cut_off = time() - self.BLOB_PRUNE_MIN_AGE
+        for filename in filenames:
+            if filename in in_use:
+                continue
+            filepath = os.path.join(self._blob_dir, filename)
+            try:
+                if os.path.getmtime(filepath) < cut_off:
+                    os.remove(filepath)
+            except EnvironmentError:
+                pass
+
+    def clear(self, defer=False):
+        result = super(DataCache, self).clear(defer)
+        if not defer:
+            self._prune_blobs()
+        return result
+
     def _optimize_item_count(self, limit=-1, defer=False):
         return False
@@ -13,10 +13,107 @@ from .storage import Storage
 
 
 class FeedHistory(Storage):
+    """
+    Channel feed details, stored as values keyed by channel id, and the items
+    of all channel feeds, stored in a separate table indexed by publish date.
+    """
+
     _table_name = 'storage_v2'
     _table_created = False
     _table_updated = False
-    _sql = {}
+    _sql = {
+        '_partial': True,
+        'clear_feed_items': (
+            'DELETE'
+            ' FROM feed_items;'
+        ),
+        'create_table': (
+            'CREATE TABLE'
+            ' IF NOT EXISTS {table} ('
+            '  key TEXT PRIMARY KEY,'
+            '  timestamp REAL,'
+            '  value BLOB,'
+            '  size INTEGER'
+            ' );'
+            'CREATE TABLE'
+            ' IF NOT EXISTS feed_items ('
+            '  channel_id TEXT,'
+            '  video_id TEXT,'
+            '  published REAL,'
+            '  PRIMARY KEY (channel_id, video_id)'
+            ' );'
+        ),
+        'create_index': (
+            'CREATE INDEX'
+            ' IF NOT EXISTS idx_timestamp'
+            ' ON {table} (timestamp);'
+            'CREATE INDEX'
+            ' IF NOT EXISTS idx_published'
+            ' ON feed_items (published);'
+        ),
+        'create_selection': (
+            'CREATE TEMP TABLE'
+            ' IF NOT EXISTS feed_selection ('
+            '  channel_id TEXT PRIMARY KEY,'
+            '  channel_name TEXT'
+            ' );'
+        ),
+        'clear_selection': (
+            'DELETE'
+            ' FROM temp.feed_selection;'
+        ),
+        'drop_old_table': (
+            'DELETE'
+            ' FROM sqlite_master'
+            ' WHERE type = "table"'
+            ' and name NOT IN ("{table}", "feed_items");'
+        ),
+        'get_feed_items': (
+            'SELECT items.channel_id, items.video_id, items.published'
+            ' FROM feed_items AS items'
+            ' JOIN temp.feed_selection AS channels'
+            ' ON items.channel_id = channels.channel_id'
+            ' {{0}}'
+            ' ORDER BY items.published DESC'
+            ' LIMIT {{1}}'
+            ' OFFSET {{2}};'
+        ),
+        'has_old_table': (
+            'SELECT EXISTS ('
+            ' SELECT 1'
+            ' FROM sqlite_master'
+            ' WHERE type = "table"'
+            ' and name NOT IN ("{table}", "feed_items")'
+            ');'
+        ),
+        'prune_feed_items': (
+            'DELETE'
+            ' FROM feed_items'
+            ' WHERE rowid IN ('
+            '  SELECT rowid'
+            '  FROM feed_items'
+            '  WHERE channel_id = ?'
+            '  ORDER BY published DESC'
+            '  LIMIT -1'
+            '  OFFSET {{0}}'
+            ' );'
+        ),
+        'set_feed_items': (
+            'REPLACE'
+            ' INTO feed_items'
+            ' (channel_id, video_id, published)'
+            ' VALUES (?,?,?);'
+        ),
+        'set_selection': (
+            'INSERT OR REPLACE'
+            ' INTO temp.feed_selection'
+            ' (channel_id, channel_name)'
+            ' VALUES (?,?);'
+        ),
+    }
+
+    # Maximum number of items kept for each channel
+    MAX_CHANNEL_ITEMS = 1000
 
     def __init__(self, filepath):
         super(FeedHistory, self).__init__(filepath)
@@ -32,8 +129,87 @@ class FeedHistory(Storage):
         result = self._get(content_id, seconds=seconds, as_dict=True)
         return result
 
-    def set_items(self, items):
-        self._set_many(items)
+    def set_items(self, items, defer=False):
+        self._set_many(items, defer=defer)
+
+    def get_feed_items(self, channels, filters=None, offset=0, limit=-1):
+        """
+        Returns the (channel_id, video_id, published) rows of the feed items
+        of the given channels, newest first.
+        :param dict channels: channel names keyed by channel id
+        :param dict|None filters: {'blacklist': bool, 'set': set} of channel
+                                  names to exclude, if blacklist is True, or
+                                  to include otherwise
+        :param int offset: number of rows to skip
+        :param int limit: maximum number of rows to return, or -1 for all
+        """
+        if not channels:
+            return []
+
+        condition = ''
+        values = ()
+        names = tuple(filters['set']) if filters else None
+        if not names:
+            if filters and not filters['blacklist']:
+                return []
+        else:
+            placeholders = '?,' * (len(names) - 1) + '?'
+            if filters['blacklist']:
+                condition = (
+                    'WHERE channels.channel_name IS NULL'
+                    ' OR channels.channel_name NOT IN ({0})'
+                ).format(placeholders)
+            else:
+                condition = (
+                    'WHERE channels.channel_name IN ({0})'
+                ).format(placeholders)
+            values = names
+        query = self._sql['get_feed_items'].format(condition, limit, offset)
+
+        with self as (db, cursor), db:
+            self._execute(cursor, self._sql['create_selection'])
+            self._execute(cursor, 'BEGIN')
+            self._execute(cursor, self._sql['clear_selection'])
+            self._execute(cursor,
+                          self._sql['set_selection'],
+                          values=tuple(channels.items()),
+                          many=True)
+            result = self._execute(cursor, query, values)
+            result = result.fetchall() if result else []
+        return result
+
+    def set_feed_items(self, feeds):
+        """
+        Stores feed items, keeping up to MAX_CHANNEL_ITEMS items per channel.
+        :param dict feeds: lists of feed items keyed by channel id
+        """
+        rows = [
+            (channel_id, item['id'], item['_timestamp'])
+            for channel_id, items in feeds.items()
+            for item in items
+        ]
+        if not rows:
+            return
+        prune_query = self._sql['prune_feed_items'].format(
+            self.MAX_CHANNEL_ITEMS
+        )
+        with self as (db, cursor), db:
+            self._execute(cursor, 'BEGIN')
+            self._execute(cursor,
+                          self._sql['set_feed_items'],
+                          values=rows,
+                          many=True)
+            self._execute(cursor,
+                          prune_query,
+                          values=[(channel_id,) for channel_id in feeds],
+                          many=True)
+
+    def clear(self, defer=False):
+        result = super(FeedHistory, self).clear(defer)
+        if not defer:
+            with self as (db, cursor), db:
+                self._execute(cursor, self._sql['clear_feed_items'])
+        return result
 
     def _optimize_item_count(self, limit=-1, defer=False):
         return False
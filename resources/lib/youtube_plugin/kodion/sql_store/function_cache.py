@@ -22,6 +22,7 @@ class FunctionCache(Storage):
     _table_created = False
     _table_updated = False
     _sql = {}
+    _memory_cache_size_kb = 4096
 
     _BUILTIN = str.__module__
     SCOPE_NONE = 0
@@ -48,6 +49,9 @@ class FunctionCache(Storage):
         """
         self._enabled = False
 
+    def is_enabled(self):
+        return self._enabled
+
     @classmethod
     def _create_id_from_func(cls, partial_func, scope=SCOPE_ALL):
         """
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+
+    Copyright (C) 2024-present plugin.video.youtube
+
+    SPDX-License-Identifier: GPL-2.0-only
+    See LICENSES/GPL-2.0-only for more information.
+"""
+
+from __future__ import absolute_import, division, unicode_literals
+
+from collections import OrderedDict
+from threading import Lock
+
+
+class MemoryCache(object):
+    """
+    Bounded, least recently used, in-process store of Storage rows, used in
+    front of the SQLite database.
+
+    Rows are kept in the same (key, timestamp, value, size) form as returned
+    from the database, with values still encoded, so that callers are free to
+    modify the decoded objects they receive.
+    """
+
+    def __init__(self, max_size_kb):
+        self._max_size = max_size_kb * 1024
+        self._size = 0
+        self._rows = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, cut_off=0):
+        with self._lock:
+            row = self._rows.pop(key, None)
+            if row is None:
+                self.misses += 1
+                return None
+            # re-insert to mark as most recently used
+            self._rows[key] = row
+            if cut_off and row[1] < cut_off:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return row
+
+    def get_many(self, keys, cut_off=0):
+        rows = []
+        missing = []
+        for key in keys:
+            row = self.get(key, cut_off)
+            if row is None:
+                missing.append(key)
+            else:
+                rows.append(row)
+        return rows, missing
+
+    def set(self, row):
+        size = row[3] or 0
+        if size > self._max_size:
+            self.remove((row[0],))
+            return
+        with self._lock:
+            old_row = self._rows.pop(row[0], None)
+            if old_row:
+                self._size -= old_row[3] or 0
+            self._rows[row[0]] = row
+            self._size += size
+            while self._size > self._max_size:
+                _, old_row = self._rows.popitem(last=False)
+                self._size -= old_row[3] or 0
+
+    def set_many(self, rows):
+        for row in rows:
+            self.set(row)
+
+    def set_timestamp(self, key, timestamp):
+        with self._lock:
+            row = self._rows.get(key)
+            if row:
+                self._rows[key] = (key, timestamp) + tuple(row[2:])
+
+    def remove(self, keys):
+        with self._lock:
+            for key in keys:
+                row = self._rows.pop(key, None)
+                if row:
+                    self._size -= row[3] or 0
+
+    def clear(self):
+        with self._lock:
+            self._rows.clear()
+            self._size = 0
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
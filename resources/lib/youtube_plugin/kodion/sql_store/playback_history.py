@@ -40,8 +40,8 @@ class PlaybackHistory(Storage):
         result = self._get(key, process=self._add_last_played)
         return result
 
-    def set_item(self, video_id, play_data, timestamp=None):
-        self._set(video_id, play_data, timestamp)
+    def set_item(self, video_id, play_data, timestamp=None, defer=False):
+        self._set(video_id, play_data, timestamp, defer=defer)
 
     def del_item(self, video_id):
         self._remove(video_id)
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+
+    Copyright (C) 2024-present plugin.video.youtube
+
+    SPDX-License-Identifier: GPL-2.0-only
+    See LICENSES/GPL-2.0-only for more information.
+"""
+
+from __future__ import absolute_import, division, unicode_literals
+
+from datetime import datetime, timedelta
+from hashlib import md5
+
+from .storage import Storage
+
+
+class QuotaLedger(Storage):
+    """
+    Daily record of YouTube Data API quota units used, per API key.
+
+    Usage is recorded as increments, merged in the write-behind queue, so that
+    recording a request does not require a database write. Increments are
+    added to the stored usage when written, so that usage recorded by other
+    processes is not overwritten.
+    """
+
+    _table_name = 'storage_v2'
+    _table_created = False
+    _table_updated = False
+    _sql = {}
+
+    # Unit cost of requests as listed in the YouTube Data API quota
+    # calculator. List requests cost 1 unit unless listed here, while insert,
+    # update and delete requests cost 50 units.
+    COSTS = {
+        'search': 100,
+    }
+    READ_COST = 1
+    WRITE_COST = 50
+
+    def __init__(self, filepath):
+        # keep records for the last ~30 days of a few API keys
+        super(QuotaLedger, self).__init__(filepath, max_item_count=100)
+
+    @classmethod
+    def get_cost(cls, method, path):
+        if path in cls.COSTS:
+            return cls.COSTS[path]
+        if method == 'GET':
+            return cls.READ_COST
+        return cls.WRITE_COST
+
+    @staticmethod
+    def get_key_id(api_key):
+        """
+        Returns an identifier for api_key that can be stored and displayed
+        """
+        return md5(api_key.encode('utf-8')).hexdigest()[:8]
+
+    @staticmethod
+    def get_quota_date():
+        """
+        Returns the current quota day. Quota is reset at midnight Pacific Time,
+        approximated here as UTC-8 without adjusting for daylight saving time.
+        """
+        return (datetime.utcnow() - timedelta(hours=8)).strftime('%Y-%m-%d')
+
+    @staticmethod
+    def _add_usage(usage, increment):
+        usage['units'] += increment['units']
+        usage['requests'] += increment['requests']
+        paths = usage['paths']
+        for path, units in increment['paths'].items():
+            paths[path] = paths.get(path, 0) + units
+        return usage
+
+    def _merge_rows(self, queued_row, row):
+        usage = self._add_usage(self._decode(queued_row[2]),
+                                self._decode(row[2]))
+        return self._encode(row[0], usage, row[1])
+
+    def record(self, api_key, method, path):
+        cost = self.get_cost(method, path)
+        item_id = ','.join((self.get_key_id(api_key), self.get_quota_date()))
+        row = self._encode(item_id, {
+            'units': cost,
+            'requests': 1,
+            'paths': {path: cost},
+        })
+        if not self._queue_rows((row,), merge=self._merge_rows):
+            self._set_merged_rows((row,), {item_id: self._merge_rows})
+        return cost
+
+    def get_used(self, api_key):
+        """
+        Returns the units used today, including usage still queued to be
+        written. The queue is read first, so that usage written in between is
+        counted twice rather than not at all.
+        """
+        key = ','.join((self.get_key_id(api_key), self.get_quota_date()))
+        queued_rows = self._get_queued_rows()
+        queued = queued_rows.get(key) if queued_rows else None
+        used = self._decode(queued[2])['units'] if queued else 0
+
+        with self as (db, cursor), db:
+            result = self._execute(cursor, self._sql['get'], [key])
+            stored = result.fetchone() if result else None
+        if stored:
+            used += self._decode(stored[2])['units']
+        return used
+
+    def get_items(self):
+        """
+        Returns usage records, most recent first, as a list of
+        (key_id, date, usage) tuples
+        """
+        result = self._get_by_ids(oldest_first=False,
+                                  as_dict=True,
+                                  values_only=True)
+        return [
+            tuple(item_id.split(',', 1)) + (usage,)
+            for item_id, usage in result.items()
+        ]
@@ -11,12 +11,14 @@
 from __future__ import absolute_import, division, unicode_literals
 
 import os
-import pickle
 import sqlite3
 import time
-from threading import Lock
+from collections import OrderedDict
+from threading import Lock, current_thread, enumerate as enumerate_threads
 from traceback import format_stack
 
+from . import codec
+from .memory_cache import MemoryCache
 from ..logger import log_error
 from ..utils.datetime_parser import fromtimestamp, since_epoch
 from ..utils.methods import make_dirs
@@ -34,6 +36,36 @@ class Storage(object):
     _table_created = False
     _table_updated = False
 
+    # Long-lived connections, keyed by (filepath, thread ident). Only used
+    # when enabled by Storage.persist_connections for the lifetime of a plugin
+    # invocation or the service process
+    _persistent = False
+    _pool = {}
+    _pool_lock = Lock()
+    _stats = {
+        'connections': 0,
+        'pragmas': 0,
+    }
+
+    # Size of in-process cache of recently used rows, shared by all instances
+    # using the same database file. Disabled if not greater than 0, or by
+    # Storage.cache_in_memory for long-lived processes, as the cache is not
+    # invalidated by writes made from other processes
+    _memory_cache_size_kb = 0
+    _memory_cache_enabled = True
+    _memory_caches = {}
+
+    # Pending writes, keyed by filepath, queued by calls made with defer=True
+    # while enabled by Storage.defer_writes, and written in one transaction
+    # per database file by Storage.flush_writes
+    _write_behind = False
+    _write_queues = {}
+    _write_lock = Lock()
+
+    # Serialisation format used for new values. Rows written with any other
+    # codec, including pickled rows from earlier versions, remain readable
+    _codec = codec.PICKLE
+
     _sql = {
         'clear': (
             'DELETE'
@@ -48,6 +80,11 @@ class Storage(object):
             '  size INTEGER'
             ' );'
         ),
+        'create_index': (
+            'CREATE INDEX'
+            ' IF NOT EXISTS idx_timestamp'
+            ' ON {table} (timestamp);'
+        ),
         'drop_old_table': (
             'DELETE'
             ' FROM sqlite_master'
@@ -115,7 +152,25 @@ class Storage(object):
             '  OFFSET {{1}}'
             ' );'
         ),
+        # Running total of row sizes, oldest first, from a single scan of the
+        # timestamp index. Rows written in the same batch share a timestamp but
+        # are summed individually, so part of a batch can be pruned. Falls back
+        # to a correlated sub-query, with quadratic cost, if window functions
+        # are not supported by SQLite (added in v3.25.0)
         'prune_by_size': (
+            'DELETE'
+            ' FROM {table}'
+            ' WHERE rowid IN ('
+            '  SELECT rowid'
+            '  FROM ('
+            '   SELECT rowid, SUM(size) OVER ('
+            '    ORDER BY timestamp ROWS UNBOUNDED PRECEDING'
+            '   ) AS total'
+            '   FROM {table}'
+            '  )'
+            '  WHERE total <= {{0}}'
+            ' );'
+        ) if sqlite3.sqlite_version_info >= (3, 25, 0) else (
             'DELETE'
             ' FROM {table}'
             ' WHERE rowid IN ('
@@ -156,6 +211,12 @@ class Storage(object):
             ' SET timestamp = ?, value = ?, size = ?'
             ' WHERE key = ?;'
         ),
+        'update_timestamp': (
+            'UPDATE'
+            ' {table}'
+            ' SET timestamp = ?'
+            ' WHERE key = ?;'
+        ),
     }
 
     def __init__(self,
@@ -171,6 +232,15 @@ class Storage(object):
         self._max_item_count = -1 if migrate else max_item_count
         self._max_file_size_kb = -1 if migrate else max_file_size_kb
 
+        if (migrate
+                or not Storage._memory_cache_enabled
+                or self._memory_cache_size_kb <= 0):
+            self._memory_cache = None
+        else:
+            self._memory_cache = Storage._memory_caches.setdefault(
+                self._filepath, MemoryCache(self._memory_cache_size_kb)
+            )
+
         if migrate:
             self._base = self
             self._sql = {}
@@ -208,14 +278,183 @@ class Storage(object):
     def set_max_file_size_kb(self, max_file_size_kb):
         self._max_file_size_kb = max_file_size_kb
 
+    @classmethod
+    def persist_connections(cls, enable=True):
+        """
+        Keep database connections open, per thread and per file, between
+        calls rather than connecting and closing for every operation.
+        Disabling persistence closes all pooled connections.
+        """
+        Storage._persistent = enable
+        if not enable:
+            cls.close_connections()
+
+    @classmethod
+    def close_connections(cls, only_dead_threads=False):
+        pool = Storage._pool
+        with Storage._pool_lock:
+            if only_dead_threads:
+                alive = {thread.ident for thread in enumerate_threads()}
+                keys = [key for key in pool if key[1] not in alive]
+            else:
+                keys = list(pool)
+            connections = [pool.pop(key) for key in keys]
+        for db, cursor in connections:
+            cls._close_connection(db, cursor)
+
+    @classmethod
+    def defer_writes(cls, enable=True):
+        """
+        Queue writes made with defer=True, rather than writing them
+        immediately, until flushed with Storage.flush_writes. Disabling
+        deferred writes flushes any queued writes.
+        """
+        Storage._write_behind = enable
+        if not enable:
+            cls.flush_writes()
+
+    @classmethod
+    def flush_writes(cls):
+        with Storage._write_lock:
+            write_queues = Storage._write_queues
+            Storage._write_queues = {}
+        for storage, rows, merges in write_queues.values():
+            if merges:
+                merged_rows = [rows.pop(key) for key in merges if key in rows]
+                if merged_rows:
+                    storage._set_merged_rows(merged_rows, merges)
+            if rows:
+                storage._set_rows(list(rows.values()))
+
+    def _queue_rows(self, rows, merge=None):
+        """
+        Queues rows to be written by Storage.flush_writes. A row replaces any
+        queued row with the same key, unless a merge function is provided, in
+        which case the queued row is replaced by merge(queued_row, row), and
+        the row is also merged with the stored row when written.
+        """
+        if not Storage._write_behind:
+            return False
+        with Storage._write_lock:
+            write_queue = Storage._write_queues.get(self._filepath)
+            if not write_queue:
+                write_queue = (self, OrderedDict(), {})
+                Storage._write_queues[self._filepath] = write_queue
+            queued_rows = write_queue[1]
+            merges = write_queue[2]
+            for row in rows:
+                key = row[0]
+                if merge:
+                    if key in queued_rows:
+                        row = merge(queued_rows[key], row)
+                    merges[key] = merge
+                queued_rows[key] = row
+        return True
+
+    def _get_queued_rows(self):
+        write_queue = Storage._write_queues.get(self._filepath)
+        return write_queue[1] if write_queue else None
+
+    def _get_queued_merged_rows(self, keys):
+        """
+        Returns the queued rows for keys, as they will be written by
+        Storage.flush_writes. Rows queued with a merge function are merged with
+        the stored rows, as the queued row only holds the changes to be merged.
+        """
+        write_queue = Storage._write_queues.get(self._filepath)
+        if not write_queue:
+            return []
+        queued_rows = write_queue[1]
+        merges = write_queue[2]
+        rows = [queued_rows[key] for key in keys if key in queued_rows]
+        merge_keys = tuple([row[0] for row in rows if row[0] in merges])
+        if not merge_keys:
+            return rows
+
+        num_keys = len(merge_keys)
+        query = self._sql['get_by_key'].format('?,' * (num_keys - 1) + '?')
+        with self as (db, cursor), db:
+            result = self._execute(cursor, query, merge_keys)
+            stored_rows = {
+                stored_row[0]: stored_row
+                for stored_row in (result.fetchall() if result else ())
+            }
+        return [
+            merges[row[0]](stored_rows[row[0]], row)
+            if row[0] in stored_rows else
+            row
+            for row in rows
+        ]
+
+    def _discard_queued_rows(self, keys=None):
+        with Storage._write_lock:
+            write_queue = Storage._write_queues.get(self._filepath)
+            if not write_queue:
+                return
+            if keys is None:
+                write_queue[1].clear()
+                write_queue[2].clear()
+                return
+            for key in keys:
+                write_queue[1].pop(key, None)
+                write_queue[2].pop(key, None)
+
+    @classmethod
+    def cache_in_memory(cls, enable=True):
+        """
+        Enable or disable the in-process cache of recently used rows for
+        storage instances created after this call. Disabling clears and
+        discards all existing memory caches.
+        """
+        Storage._memory_cache_enabled = enable
+        if not enable:
+            cls.clear_memory_caches()
+            Storage._memory_caches = {}
+
+    @classmethod
+    def clear_memory_caches(cls):
+        for memory_cache in Storage._memory_caches.values():
+            memory_cache.clear()
+
+    @classmethod
+    def get_stats(cls, reset=False):
+        stats = Storage._stats.copy()
+        memory_caches = Storage._memory_caches.values()
+        stats['memory_hits'] = sum(cache.hits for cache in memory_caches)
+        stats['memory_misses'] = sum(cache.misses for cache in memory_caches)
+        if reset:
+            Storage._stats = dict.fromkeys(Storage._stats, 0)
+            for memory_cache in memory_caches:
+                memory_cache.reset_stats()
+        return stats
+
     def __enter__(self):
         self._lock.acquire()
-        if not self._db or not self._cursor:
+        if self._persistent:
+            key = (self._filepath, current_thread().ident)
+            self._db, self._cursor = self._pool.get(key, (None, None))
+            # database file was removed by another process, i.e. by the
+            # delete maintenance action, so reconnect to a new file
+            if self._db and not os.path.exists(self._filepath):
+                with self._pool_lock:
+                    self._pool.pop(key, None)
+                self._close()
+            if not self._db or not self._cursor:
+                self.close_connections(only_dead_threads=True)
+                self._open()
+                if self._db and self._cursor:
+                    with self._pool_lock:
+                        self._pool[key] = (self._db, self._cursor)
+        elif not self._db or not self._cursor:
             self._open()
         return self._db, self._cursor
 
     def __exit__(self, exc_type=None, exc_val=None, exc_tb=None):
-        self._close()
+        if self._persistent:
+            self._db = None
+            self._cursor = None
+        else:
+            self._close()
         self._lock.release()
 
     def _open(self):
@@ -253,15 +492,17 @@ class Storage(object):
             'PRAGMA temp_store = MEMORY;',
             'PRAGMA mmap_size = 4096000;',
             'PRAGMA page_size = 4096;',
+            'PRAGMA auto_vacuum = INCREMENTAL;',
             'PRAGMA cache_size = 1000;',
             'PRAGMA journal_mode = WAL;',
         ]
         statements = []
 
         if not self._table_created:
-            statements.append(
-                self._sql['create_table']
-            )
+            statements.extend((
+                self._sql['create_table'],
+                self._sql['create_index'],
+            ))
 
         if not self._table_updated:
             for result in self._execute(cursor, self._sql['has_old_table']):
@@ -277,7 +518,11 @@ class Storage(object):
             transaction_begin = len(sql_script) + 1
             sql_script.extend(('BEGIN;', 'COMMIT;', 'VACUUM;'))
             sql_script[transaction_begin:transaction_begin] = statements
-        self._execute(cursor, '\n'.join(sql_script), script=True)
+        sql_script = '\n'.join(sql_script)
+        self._execute(cursor, sql_script, script=True)
+
+        self._stats['connections'] += 1
+        self._stats['pragmas'] += sql_script.count('PRAGMA')
 
         self._base._table_created = True
         self._base._table_updated = True
@@ -285,15 +530,20 @@ class Storage(object):
         self._cursor = cursor
 
     def _close(self):
-        if self._cursor:
-            self._execute(self._cursor, 'PRAGMA optimize')
-            self._cursor.close()
-            self._cursor = None
-        if self._db:
-            # Not needed if using self._db as a context manager
-            # self._db.commit()
-            self._db.close()
-            self._db = None
+        self._close_connection(self._db, self._cursor)
+        self._db = None
+        self._cursor = None
+
+    @classmethod
+    def _close_connection(cls, db, cursor):
+        if cursor:
+            cls._execute(cursor, 'PRAGMA optimize')
+            cls._stats['pragmas'] += 1
+            cursor.close()
+        if db:
+            # Not needed if using db as a context manager
+            # db.commit()
+            db.close()
 
     @staticmethod
     def _execute(cursor, query, values=None, many=False, script=False):
@@ -325,20 +575,30 @@ class Storage(object):
         if self._max_file_size_kb <= 0:
             return False
 
-        try:
-            file_size_kb = (os.path.getsize(self._filepath) // 1024)
-            if file_size_kb <= self._max_file_size_kb:
-                return False
-        except OSError:
+        # Use the size of the database pages in use rather than the size of the
+        # file on disk, which excludes changes in the write-ahead log that are
+        # yet to be checkpointed, including pages freed by incremental vacuum
+        file_size_kb = 1
+        with self as (db, cursor):
+            for pragma in ('PRAGMA page_size', 'PRAGMA page_count'):
+                result = self._execute(cursor, pragma)
+                result = result.fetchone() if result else None
+                if not result:
+                    return False
+                file_size_kb *= result[0]
+        file_size_kb //= 1024
+        if file_size_kb <= self._max_file_size_kb:
             return False
 
         prune_size = 1024 * int(file_size_kb - self._max_file_size_kb / 2)
         query = self._sql['prune_by_size'].format(prune_size)
+        if self._memory_cache:
+            self._memory_cache.clear()
         if defer:
             return query
         with self as (db, cursor), db:
             self._execute(cursor, query)
-            self._execute(cursor, 'VACUUM')
+            self._execute(cursor, 'PRAGMA incremental_vacuum;', script=True)
         return True
 
     def _optimize_item_count(self, limit=-1, defer=False):
@@ -355,36 +615,44 @@ class Storage(object):
         query = self._sql['prune_by_count'].format(
             limit, self._max_item_count
         )
+        if self._memory_cache:
+            self._memory_cache.clear()
         if defer:
             return query
         with self as (db, cursor), db:
             self._execute(cursor, query)
-            self._execute(cursor, 'VACUUM')
+            self._execute(cursor, 'PRAGMA incremental_vacuum;', script=True)
         return True
 
-    def _set(self, item_id, item, timestamp=None):
+    def _set(self, item_id, item, timestamp=None, defer=False):
         values = self._encode(item_id, item, timestamp)
+        if defer and self._queue_rows((values,)):
+            return
         optimize_query = self._optimize_item_count(1, defer=True)
         with self as (db, cursor), db:
             if optimize_query:
                 self._execute(cursor, 'BEGIN')
                 self._execute(cursor, optimize_query)
             self._execute(cursor, self._sql['set'], values=values)
+        if self._memory_cache:
+            self._memory_cache.set(values)
 
-    def _set_many(self, items, flatten=False):
+    def _set_many(self, items, flatten=False, defer=False):
         now = since_epoch()
-        num_items = len(items)
+        rows = [self._encode(*item, timestamp=now) for item in items.items()]
+        if defer and self._queue_rows(rows):
+            return
+        self._set_rows(rows, flatten)
 
+    def _set_rows(self, rows, flatten=False):
+        num_items = len(rows)
         if flatten:
-            values = [enc_part
-                      for item in items.items()
-                      for enc_part in self._encode(*item, timestamp=now)]
+            values = [enc_part for row in rows for enc_part in row]
             query = self._sql['set_flat'].format(
                 '(?,?,?,?),' * (num_items - 1) + '(?,?,?,?)'
             )
         else:
-            values = [self._encode(*item, timestamp=now)
-                      for item in items.items()]
+            values = rows
             query = self._sql['set']
 
         optimize_query = self._optimize_item_count(num_items, defer=True)
@@ -393,20 +661,97 @@ class Storage(object):
             if optimize_query:
                 self._execute(cursor, optimize_query)
             self._execute(cursor, query, many=(not flatten), values=values)
+        if self._memory_cache:
+            self._memory_cache.set_many(rows)
         self._optimize_file_size()
 
-    def _update(self, item_id, item, timestamp=None):
+    def _set_merged_rows(self, rows, merges):
+        """
+        Writes rows merged with the stored rows, using the merge(stored_row,
+        row) functions keyed by row key, reading and writing the stored rows
+        in a single write transaction
+        """
+        optimize_query = self._optimize_item_count(len(rows), defer=True)
+        with self as (db, cursor), db:
+            self._execute(cursor, 'BEGIN IMMEDIATE')
+            if optimize_query:
+                self._execute(cursor, optimize_query)
+            for row in rows:
+                key = row[0]
+                result = self._execute(cursor, self._sql['get'], [key])
+                stored_row = result.fetchone() if result else None
+                if stored_row:
+                    row = merges[key](stored_row, row)
+                self._execute(cursor, self._sql['set'], values=row)
+        if self._memory_cache:
+            self._memory_cache.remove([row[0] for row in rows])
+        self._optimize_file_size()
+
+    def _merge(self, item_id, item, merge, defer=False):
+        """
+        Stores item merged with the stored item using merge(stored_item, item).
+        The stored item is read when written, rather than beforehand, so that
+        concurrent updates from other processes are not lost.
+        """
+        def merge_rows(stored_row, row):
+            merged_item = merge(self._decode(stored_row[2]),
+                                self._decode(row[2]))
+            return self._encode(row[0], merged_item, row[1])
+
+        row = self._encode(item_id, item)
+        if defer and self._queue_rows((row,), merge=merge_rows):
+            return
+        self._set_merged_rows((row,), {row[0]: merge_rows})
+
+    def _update(self, item_id, item=None, timestamp=None):
+        """
+        Updates the value and timestamp of an existing row. If item is None,
+        only the timestamp is updated, without decoding or re-encoding the
+        stored value.
+        """
+        if item is None:
+            return self._update_timestamp(item_id, timestamp)
+
         values = self._encode(item_id, item, timestamp, for_update=True)
+        key = values[-1]
+        # update a queued write in place, as it would otherwise overwrite the
+        # updated row when flushed
+        with Storage._write_lock:
+            queued_rows = self._get_queued_rows()
+            if queued_rows and key in queued_rows:
+                queued_rows[key] = (key,) + values[:-1]
+                return
         with self as (db, cursor), db:
             self._execute(cursor, self._sql['update'], values=values)
+        if self._memory_cache:
+            self._memory_cache.remove((key,))
+
+    def _update_timestamp(self, item_id, timestamp=None):
+        timestamp = timestamp or since_epoch()
+        key = str(item_id)
+        with Storage._write_lock:
+            queued_rows = self._get_queued_rows()
+            if queued_rows and key in queued_rows:
+                row = queued_rows[key]
+                queued_rows[key] = (key, timestamp) + tuple(row[2:])
+                return
+        with self as (db, cursor), db:
+            self._execute(cursor,
+                          self._sql['update_timestamp'],
+                          values=(timestamp, key))
+        if self._memory_cache:
+            self._memory_cache.set_timestamp(key, timestamp)
 
     def clear(self, defer=False):
         query = self._sql['clear']
+        self._discard_queued_rows()
+        if self._memory_cache:
+            self._memory_cache.clear()
         if defer:
             return query
         with self as (db, cursor), db:
             self._execute(cursor, query)
-            self._execute(cursor, 'VACUUM')
+            self._execute(cursor, 'PRAGMA incremental_vacuum;', script=True)
         return True
 
     def is_empty(self):
@@ -421,17 +766,15 @@ class Storage(object):
 
     @staticmethod
     def _decode(obj, process=None, item=None):
-        decoded_obj = pickle.loads(obj)
+        decoded_obj = codec.decode(obj)
         if process:
             return process(decoded_obj, item)
         return decoded_obj
 
-    @staticmethod
-    def _encode(key, obj, timestamp=None, for_update=False):
+    @classmethod
+    def _encode(cls, key, obj, timestamp=None, for_update=False):
         timestamp = timestamp or since_epoch()
-        blob = sqlite3.Binary(pickle.dumps(
-            obj, protocol=pickle.HIGHEST_PROTOCOL
-        ))
+        blob = sqlite3.Binary(codec.encode(obj, cls._codec))
         size = getattr(blob, 'nbytes', None)
         if not size:
             size = int(memoryview(blob).itemsize) * len(blob)
@@ -442,12 +785,21 @@ class Storage(object):
         return timestamp, blob, size
 
     def _get(self, item_id, process=None, seconds=None, as_dict=False):
-        with self as (db, cursor), db:
-            result = self._execute(cursor, self._sql['get'], [str(item_id)])
-            item = result.fetchone() if result else None
-            if not item:
-                return None
         cut_off = since_epoch() - seconds if seconds else 0
+        key = str(item_id)
+        queued_rows = self._get_queued_merged_rows((key,))
+        item = queued_rows[0] if queued_rows else None
+        memory_cache = self._memory_cache
+        if not item and memory_cache:
+            item = memory_cache.get(key, cut_off)
+        if not item:
+            with self as (db, cursor), db:
+                result = self._execute(cursor, self._sql['get'], [key])
+                item = result.fetchone() if result else None
+                if not item:
+                    return None
+            if memory_cache:
+                memory_cache.set(item)
         if not cut_off or item[1] >= cut_off:
             if as_dict:
                 return {
@@ -461,6 +813,11 @@ class Storage(object):
     def _get_by_ids(self, item_ids=None, oldest_first=True, limit=-1,
                     wildcard=False, seconds=None, process=None,
                     as_dict=False, values_only=True):
+        epoch = since_epoch()
+        cut_off = epoch - seconds if seconds else 0
+        memory_cache = None
+        result = []
+
         if not item_ids:
             if oldest_first:
                 query = self._sql['get_many']
@@ -474,49 +831,75 @@ class Storage(object):
                 query = self._sql['get_by_key_like_desc']
             query = query.format(limit)
         else:
+            item_ids = [str(item_id) for item_id in item_ids]
+            result = self._get_queued_merged_rows(item_ids)
+            if result:
+                queued_ids = {row[0] for row in result}
+                item_ids = [item_id
+                            for item_id in item_ids
+                            if item_id not in queued_ids]
+            memory_cache = self._memory_cache
+            if memory_cache and item_ids:
+                cached, item_ids = memory_cache.get_many(item_ids, cut_off)
+                result.extend(cached)
             num_ids = len(item_ids)
-            query = self._sql['get_by_key'].format('?,' * (num_ids - 1) + '?')
-            item_ids = tuple(item_ids)
-
-        epoch = since_epoch()
-        cut_off = epoch - seconds if seconds else 0
-        with self as (db, cursor), db:
-            result = self._execute(cursor, query, item_ids)
-            if as_dict:
-                if values_only:
-                    result = {
-                        item[0]: self._decode(item[2], process, item)
-                        for item in result if not cut_off or item[1] >= cut_off
-                    }
-                else:
-                    result = {
-                        item[0]: {
-                            'age': epoch - item[1],
-                            'value': self._decode(item[2], process, item),
-                        }
-                        for item in result if not cut_off or item[1] >= cut_off
-                    }
-            elif values_only:
-                result = [
-                    self._decode(item[2], process, item)
+            if num_ids:
+                query = self._sql['get_by_key'].format(
+                    '?,' * (num_ids - 1) + '?'
+                )
+                item_ids = tuple(item_ids)
+            else:
+                query = None
+
+        if query:
+            with self as (db, cursor), db:
+                rows = self._execute(cursor, query, item_ids)
+                rows = rows.fetchall() if rows else []
+            if memory_cache:
+                memory_cache.set_many(rows)
+            result.extend(rows)
+
+        if as_dict:
+            if values_only:
+                result = {
+                    item[0]: self._decode(item[2], process, item)
                     for item in result if not cut_off or item[1] >= cut_off
-                ]
+                }
             else:
-                result = [
-                    (item[0],
-                     fromtimestamp(item[1]),
-                     self._decode(item[2], process, item))
+                result = {
+                    item[0]: {
+                        'age': epoch - item[1],
+                        'value': self._decode(item[2], process, item),
+                    }
                     for item in result if not cut_off or item[1] >= cut_off
-                ]
+                }
+        elif values_only:
+            result = [
+                self._decode(item[2], process, item)
+                for item in result if not cut_off or item[1] >= cut_off
+            ]
+        else:
+            result = [
+                (item[0],
+                 fromtimestamp(item[1]),
+                 self._decode(item[2], process, item))
+                for item in result if not cut_off or item[1] >= cut_off
+            ]
         return result
 
     def _remove(self, item_id):
+        self._discard_queued_rows((str(item_id),))
         with self as (db, cursor), db:
             self._execute(cursor, self._sql['remove'], [item_id])
+        if self._memory_cache:
+            self._memory_cache.remove((str(item_id),))
 
     def _remove_many(self, item_ids):
+        self._discard_queued_rows([str(item_id) for item_id in item_ids])
         num_ids = len(item_ids)
         query = self._sql['remove_by_key'].format('?,' * (num_ids - 1) + '?')
         with self as (db, cursor), db:
             self._execute(cursor, query, tuple(item_ids))
-            self._execute(cursor, 'VACUUM')
+            self._execute(cursor, 'PRAGMA incremental_vacuum;', script=True)
+        if self._memory_cache:
+            self._memory_cache.remove([str(item_id) for item_id in item_ids])
@@ -31,9 +31,11 @@ from .methods import (
     wait,
 )
 from .system_version import current_system_version
+from .thread_pool import ThreadPool
 
 
 __all__ = (
+    'ThreadPool',
     'current_system_version',
     'datetime_parser',
     'duration_to_seconds',
@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""
+
+    Copyright (C) 2024-present plugin.video.youtube
+
+    SPDX-License-Identifier: GPL-2.0-only
+    See LICENSES/GPL-2.0-only for more information.
+"""
+
+from __future__ import absolute_import, division, unicode_literals
+
+import sys
+from collections import deque
+from threading import Event, Lock, Thread
+from time import time
+
+from ..compatibility import cpu_count
+
+
+class Task(object):
+    """
+    Result placeholder for a callable submitted to a ThreadPool
+    """
+
+    def __init__(self, func, args, kwargs):
+        self._func = func
+        self._args = args
+        self._kwargs = kwargs
+        self._done = Event()
+        self._result = None
+        self._exc_info = None
+
+    def run(self):
+        try:
+            self._result = self._func(*self._args, **self._kwargs)
+        except Exception:
+            self._exc_info = sys.exc_info()
+        finally:
+            self._func = self._args = self._kwargs = None
+            self._done.set()
+
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        self._done.wait(timeout)
+        return self._done.is_set()
+
+    def result(self, timeout=None):
+        if not self.wait(timeout):
+            return None
+        if self._exc_info:
+            exc_info = self._exc_info
+            self._exc_info = None
+            try:
+                raise exc_info[1].with_traceback(exc_info[2])
+            except AttributeError:
+                raise exc_info[1]
+        return self._result
+
+
+class ThreadPool(object):
+    """
+    Bounded pool of worker threads.
+
+    Workers are only started when tasks are submitted, up to max_workers, and
+    exit as soon as there are no more pending tasks, so that no threads are
+    left running once the plugin has finished.
+
+    Threads waiting on tasks using ThreadPool.wait or ThreadPool.map will run
+    the awaited tasks themselves, if not yet started by a worker, so tasks can
+    submit and wait on further tasks without exhausting the pool.
+    """
+
+    def __init__(self, max_workers=None, name='ThreadPool'):
+        if not max_workers:
+            try:
+                num_cores = cpu_count() or 1
+            except NotImplementedError:
+                num_cores = 1
+            max_workers = min(32, 2 * (num_cores + 4))
+        self._max_workers = max(1, max_workers)
+        self._name = name
+        self._pending = deque()
+        self._workers = 0
+        self._lock = Lock()
+
+    @property
+    def max_workers(self):
+        return self._max_workers
+
+    @max_workers.setter
+    def max_workers(self, value):
+        self._max_workers = max(1, value or 1)
+
+    def _worker(self):
+        while 1:
+            with self._lock:
+                if not self._pending:
+                    self._workers -= 1
+                    return
+                task = self._pending.popleft()
+            task.run()
+
+    def _run_pending(self, tasks):
+        """
+        Runs the first of tasks that is still pending in the calling thread.
+        Returns False if none of tasks are pending.
+        """
+        with self._lock:
+            pending = self._pending
+            for task in tasks:
+                if task in pending:
+                    pending.remove(task)
+                    break
+            else:
+                return False
+        task.run()
+        return True
+
+    def run_pending(self, task):
+        """
+        Runs task in the calling thread if not yet started by a worker.
+        Returns False if task was already started.
+        """
+        return self._run_pending((task,))
+
+    def submit(self, func, *args, **kwargs):
+        task = Task(func, args, kwargs)
+        with self._lock:
+            self._pending.append(task)
+            if self._workers >= self._max_workers:
+                return task
+            self._workers += 1
+            worker_id = self._workers
+        thread = Thread(target=self._worker,
+                        name='{0}-{1}'.format(self._name, worker_id))
+        thread.daemon = True
+        thread.start()
+        return task
+
+    def wait(self, tasks, timeout=None):
+        """
+        Waits for all tasks to complete, running any of tasks not yet started
+        by a worker in the calling thread rather than blocking. Returns True if
+        all tasks completed, or False if timeout, in seconds for all tasks,
+        expired.
+        """
+        tasks = tuple(tasks)
+        deadline = None if timeout is None else time() + timeout
+        while self._run_pending(tasks):
+            if deadline is not None and time() >= deadline:
+                break
+        for task in tasks:
+            if task.done():
+                continue
+            if deadline is None:
+                task.wait()
+            elif not task.wait(max(0, deadline - time())):
+                return False
+        return True
+
+    def map(self, func, iterable, max_workers=None):
+        """
+        Calls func with each item of iterable, concurrently using up to
+        max_workers threads, and returns the results in the same order as the
+        items of iterable. Exceptions raised by func are re-raised in the
+        calling thread.
+        """
+        items = tuple(iterable)
+        num_items = len(items)
+        max_workers = min(num_items, max_workers or self._max_workers)
+        if max_workers < 2:
+            return [func(item) for item in items]
+
+        results = [None] * num_items
+        indices = iter(range(num_items))
+        lock = Lock()
+
+        def _run():
+            while 1:
+                with lock:
+                    idx = next(indices, None)
+                if idx is None:
+                    return
+                results[idx] = func(items[idx])
+
+        tasks = [self.submit(_run) for _ in range(max_workers)]
+        self.wait(tasks)
+        for task in tasks:
+            task.result()
+        return results
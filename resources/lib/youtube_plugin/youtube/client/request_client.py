@@ -9,6 +9,8 @@
 
 from __future__ import absolute_import, division, unicode_literals
 
+from string import Formatter
+
 from ..youtube_exceptions import YouTubeException
 from ...kodion.network import BaseRequestsClass
 from ...kodion.utils import merge_dicts
@@ -288,12 +290,19 @@ class YouTubeRequestClient(BaseRequestsClass):
         },
     }
 
+    # Client configs merged with the common config, built once per process and
+    # keyed by (CLIENTS id, client name)
+    _base_clients = {}
+
     def __init__(self, language=None, region=None, exc_type=None, **_kwargs):
         common_client = self.CLIENTS['_common']['json']['context']['client']
         # the default language is always en_US (like YouTube on the WEB)
         language = language.replace('-', '_') if language else 'en_US'
+        region = region if region else 'US'
+        if common_client['hl'] != language or common_client['gl'] != region:
+            YouTubeRequestClient._base_clients.clear()
         self._language = common_client['hl'] = language
-        self._region = common_client['gl'] = region if region else 'US'
+        self._region = common_client['gl'] = region
 
         if isinstance(exc_type, tuple):
             exc_type = (YouTubeException,) + exc_type
@@ -345,8 +354,20 @@ class YouTubeRequestClient(BaseRequestsClass):
         return result
 
     @classmethod
-    def build_client(cls, client_name=None, data=None):
-        templates = {}
+    def _get_base_client(cls, client_name=None):
+        """
+        Returns a (config, templates, blocked) tuple for the named client.
+        config is the client config merged with the common config, with all
+        templates formatted using the values of the merged config. templates
+        lists the (keys, template, fields, static) details used to re-format
+        the templates that depend on request data. blocked holds the KeyError
+        markers of values that cannot be set by request data.
+        Built once and then cached for the lifetime of the process.
+        """
+        key = (id(cls.CLIENTS), client_name)
+        base_client = cls._base_clients.get(key)
+        if base_client:
+            return base_client
 
         client = None
         if client_name:
@@ -355,12 +376,81 @@ class YouTubeRequestClient(BaseRequestsClass):
                 return None
         if not client:
             client = YouTubeRequestClient.CLIENTS['web']
-        client = client.copy()
+
+        blocked = {}
+        for name, value in client.items():
+            if value is KeyError:
+                blocked[name] = value
+        if blocked:
+            client = {
+                name: value
+                for name, value in client.items()
+                if name not in blocked
+            }
+
+        templates = {}
+        config = merge_dicts(cls.CLIENTS['_common'], client, templates)
+        config['_name'] = client_name
+
+        paths = {id(config): ()}
+        dicts = [config]
+        while dicts:
+            values = dicts.pop()
+            for name, value in values.items():
+                if isinstance(value, dict):
+                    paths[id(value)] = paths[id(values)] + (name,)
+                    dicts.append(value)
+
+        _templates = []
+        for values, template_id, template in templates.values():
+            fields = tuple(
+                tuple(field_name.replace(']', '').split('['))
+                for _, field_name, _, _ in Formatter().parse(template)
+                if field_name
+            )
+            try:
+                values[template_id] = template.format(**config)
+                static = True
+            except (KeyError, IndexError, TypeError):
+                static = False
+            _templates.append((
+                paths[id(values)] + (template_id,), template, fields, static
+            ))
+
+        base_client = (config, tuple(_templates), blocked)
+        cls._base_clients[key] = base_client
+        return base_client
+
+    @staticmethod
+    def _has_path(data, keys):
+        value = data
+        for key in keys:
+            if key not in value:
+                return False
+            value = value[key]
+            if not isinstance(value, dict):
+                break
+        return True
+
+    @classmethod
+    def build_client(cls, client_name=None, data=None):
+        base_client = cls._get_base_client(client_name)
+        if not base_client:
+            return None
+        config, templates, blocked = base_client
 
         if data:
-            client = merge_dicts(client, data)
-        client = merge_dicts(cls.CLIENTS['_common'], client, templates)
-        client['_name'] = client_name
+            if blocked:
+                data = merge_dicts(blocked, data)
+            client = merge_dicts(config, data)
+        else:
+            client = config.copy()
+
+        # Only headers and params are modified after the client is built, other
+        # values can be shared with the cached config
+        for name in ('headers', 'params'):
+            if name in client:
+                client[name] = client[name].copy()
 
         try:
             if client.get('_access_token'):
@@ -370,8 +460,25 @@ class YouTubeRequestClient(BaseRequestsClass):
         except KeyError:
             pass
 
-        for values, template_id, template in templates.values():
-            if template_id in values:
-                values[template_id] = template.format(**client)
+        for keys, template, fields, static in templates:
+            if data:
+                if cls._has_path(data, keys):
+                    continue
+                if static and not any(cls._has_path(data, field)
+                                      for field in fields):
+                    continue
+            elif static:
+                continue
+
+            values = client
+            try:
+                for key in keys[:-1]:
+                    values[key] = values[key].copy()
+                    values = values[key]
+                if keys[-1] not in values:
+                    continue
+            except (KeyError, AttributeError):
+                continue
+            values[keys[-1]] = template.format(**client)
 
         return client
@@ -10,26 +10,51 @@
 
 from __future__ import absolute_import, division, unicode_literals
 
-import threading
-import xml.etree.ElementTree as ET
-from copy import deepcopy
-from functools import partial
+import json
+from collections import Counter
+from hashlib import md5
 from itertools import chain, islice
+from operator import itemgetter
 from random import randint
+from time import time
 
 from .login_client import LoginClient
-from ..helper.video_info import VideoInfo
 from ..youtube_exceptions import InvalidJSON, YouTubeException
-from ...kodion.compatibility import cpu_count, string_type, to_str
-from ...kodion.utils import (
-    current_system_version,
-    datetime_parser,
-    strip_html_from_text,
-    to_unicode,
-)
+from ...kodion.compatibility import string_type, xbmcvfs
+from ...kodion.constants import PATHS
+from ...kodion.network import has_manifest
+from ...kodion.sql_store import QuotaLedger
+from ...kodion.utils import datetime_parser, strip_html_from_text
 
 
 class YouTube(LoginClient):
+    QUOTA_RESERVE = 0.1
+    # Stream URLs are not reused if they will expire within this many seconds
+    STREAMS_EXPIRY_MARGIN = 3600
+
+    FEED_MAX_AGE = 3600
+    FEED_URL = 'https://www.youtube.com/feeds/videos.xml?channel_id='
+    FEED_HEADERS = {
+        'Host': 'www.youtube.com',
+        'Connection': 'keep-alive',
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'
+                      ' AppleWebKit/537.36 (KHTML, like Gecko)'
+                      ' Chrome/87.0.4280.66 Safari/537.36',
+        'Accept': 'text/html,'
+                  'application/xhtml+xml,'
+                  'application/xml;q=0.9,'
+                  'image/webp,*/*;q=0.8',
+        'DNT': '1',
+        'Accept-Encoding': 'gzip, deflate',
+        'Accept-Language': 'en-US,en;q=0.7,de;q=0.3'
+    }
+    FEED_NAMESPACES = {
+        'atom': 'http://www.w3.org/2005/Atom',
+        'yt': 'http://www.youtube.com/xml/schemas/2015',
+        'media': 'http://search.yahoo.com/mrss/',
+    }
+    SUBSCRIPTIONS_CACHE_KEY = 'my-subscriptions-channel-ids'
+
     CLIENTS = {
         1: {
             'url': 'https://www.youtube.com/youtubei/v1/{_endpoint}',
@@ -135,6 +160,22 @@ class YouTube(LoginClient):
 
         super(YouTube, self).__init__(**kwargs)
 
+    def copy(self):
+        """
+        Returns a new client with the same configuration and access tokens,
+        for use by a thread that would otherwise share this client
+        """
+        return YouTube(context=self._context,
+                       language=self._language,
+                       region=self._region,
+                       items_per_page=self._max_results,
+                       configs={
+                           'main': self._config,
+                           'youtube-tv': self._config_tv,
+                       },
+                       access_token=self._access_token,
+                       access_token_tv=self._access_token_tv)
+
     def get_max_results(self):
         return self._max_results
 
@@ -144,6 +185,34 @@ class YouTube(LoginClient):
     def get_region(self):
         return self._region
 
+    def _get_quota_key(self):
+        return self._config.get('key') or self._config_tv.get('key')
+
+    def get_quota_remaining(self):
+        """
+        Returns the number of Data API quota units remaining today for the
+        API key in use, based on requests recorded by this add-on
+        """
+        key = self._get_quota_key()
+        if not key:
+            return None
+        limit = self._context.get_settings().api_quota()
+        return limit - self._context.get_quota_ledger().get_used(key)
+
+    def is_quota_low(self, path=None, method='GET'):
+        """
+        Returns True if a request to path would use the last QUOTA_RESERVE
+        fraction of the daily quota, which is kept for requests that cannot be
+        served from cached data
+        """
+        remaining = self.get_quota_remaining()
+        if remaining is None:
+            return False
+        if path:
+            remaining -= QuotaLedger.get_cost(method, path)
+        limit = self._context.get_settings().api_quota()
+        return remaining < limit * self.QUOTA_RESERVE
+
     def update_watch_history(self, context, video_id, url, status=None):
         if status is None:
             cmt = st = et = state = None
@@ -195,7 +264,58 @@ class YouTube(LoginClient):
         self.request(url, params=params, headers=headers,
                      error_msg='Failed to update watch history')
 
+    def _get_streams_client_key(self, context):
+        """
+        Returns a key identifying the client and settings used to resolve
+        streams, so that cached streams are not used if these change
+        """
+        settings = context.get_settings()
+        return md5(json.dumps((
+            settings.client_selection(),
+            bool(self._access_token_tv),
+            self._language,
+            settings.age_gate(),
+            settings.use_isa(),
+            settings.use_mpd_videos(),
+            settings.mpd_video_qualities(),
+            sorted(settings.stream_features()),
+            settings.get_subtitle_selection(),
+            settings.subtitle_download(),
+        ), sort_keys=True).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _streams_available(video_streams):
+        """
+        Checks that manifests and subtitle files of cached streams have not
+        been removed since the streams were resolved
+        """
+        for video_stream in video_streams:
+            if PATHS.MPD in video_stream['url']:
+                if not has_manifest(video_stream['url']):
+                    return False
+            subtitles = video_stream.get('meta', {}).get('subtitles')
+            if subtitles and not all(map(xbmcvfs.exists, subtitles)):
+                return False
+        return True
+
+    def clear_video_streams(self, context, video_id):
+        context.get_data_cache().del_item('streams,{0}'.format(video_id))
+
     def get_video_streams(self, context, video_id):
+        data_cache = context.get_data_cache()
+        cache_key = 'streams,{0}'.format(video_id)
+        client_key = self._get_streams_client_key(context)
+        cached_streams = data_cache.get_item(cache_key) or {}
+        cached = cached_streams.get(client_key)
+        if (cached
+                and cached['expires'] > time() + self.STREAMS_EXPIRY_MARGIN
+                and self._streams_available(cached['streams'])):
+            context.log_debug('Using cached streams for video_id: {0}'
+                              .format(video_id))
+            return cached['streams']
+
+        from ..helper.video_info import VideoInfo
+
         video_info = VideoInfo(context, access_token=self._access_token_tv,
                                language=self._language)
 
@@ -251,6 +371,17 @@ class YouTube(LoginClient):
 
             video_stream['title'] = title
 
+        if video_info.expires:
+            cached_streams = {
+                key: value
+                for key, value in cached_streams.items()
+                if value['expires'] > time()
+            }
+            cached_streams[client_key] = {
+                'expires': video_info.expires,
+                'streams': video_streams,
+            }
+            data_cache.set_item(cache_key, cached_streams)
         return video_streams
 
     def remove_playlist(self, playlist_id, **kwargs):
@@ -628,6 +759,8 @@ class YouTube(LoginClient):
         num_items = 10
         local_history = self._context.get_settings().use_local_history()
         history_id = self._context.get_access_manager().get_watch_history_id()
+        if local_history and self.is_quota_low():
+            history_id = None
         if not history_id:
             if local_history:
                 history = self._context.get_playback_history()
@@ -667,6 +800,7 @@ class YouTube(LoginClient):
             '_pages': {},
             '_related': {},
         }
+        thread_pool = self._context.get_thread_pool()
 
         def index_items(items, index,
                         item_store=None,
@@ -678,8 +812,7 @@ class YouTube(LoginClient):
             if original_ids is not None:
                 original_ids = list(original_ids)
 
-            running = 0
-            threads = []
+            tasks = []
 
             for idx, item in enumerate(items):
                 if original_related is not None:
@@ -727,25 +860,19 @@ class YouTube(LoginClient):
                 if num_stored or depth <= 1:
                     continue
 
-                running += 1
-                thread = threading.Thread(
-                    target=threaded_get_related,
-                    args=(video_id, index_items, counts),
-                    kwargs={'item_store': item_store,
-                            'group': (group + 1),
-                            'depth': (depth - 1),
-                            'original_related': related,
-                            'original_channel': channel},
-                )
-                thread.daemon = True
-                threads.append(thread)
-                thread.start()
+                tasks.append(thread_pool.submit(
+                    threaded_get_related,
+                    video_id,
+                    index_items,
+                    counts,
+                    item_store=item_store,
+                    group=(group + 1),
+                    depth=(depth - 1),
+                    original_related=related,
+                    original_channel=channel,
+                ))
 
-            while running:
-                for thread in threads:
-                    thread.join(5)
-                    if not thread.is_alive():
-                        running -= 1
+            thread_pool.wait(tasks)
 
         index_items(cached, counts, original_ids=video_ids)
 
@@ -756,26 +883,14 @@ class YouTube(LoginClient):
             if related and 'items' in related:
                 func(related['items'][:items_per_page], *args, **kwargs)
 
-        running = 0
-        threads = []
         candidates = []
-        for video_id in video_ids:
-            if video_id in counts['_related']:
-                continue
-            running += 1
-            thread = threading.Thread(
-                target=threaded_get_related,
-                args=(video_id, candidates.extend),
-            )
-            thread.daemon = True
-            threads.append(thread)
-            thread.start()
-
-        while running:
-            for thread in threads:
-                thread.join(5)
-                if not thread.is_alive():
-                    running -= 1
+        thread_pool.wait([
+            thread_pool.submit(threaded_get_related,
+                               video_id,
+                               candidates.extend)
+            for video_id in video_ids
+            if video_id not in counts['_related']
+        ])
 
         num_items = items_per_page * num_items * max_depth
         index_items(candidates[:num_items], counts,
@@ -1443,6 +1558,208 @@ class YouTube(LoginClient):
                                 params=params,
                                 **kwargs)
 
+    def _parse_feed(self, channel_id, feed_details, response):
+        """
+        Parses the feed incrementally as it is received, stopping at the
+        first entry older than the newest cached item
+        """
+        from xml.etree.ElementTree import iterparse
+
+        _ns = self.FEED_NAMESPACES
+        newest = feed_details.get('newest') or 0
+        entry_tag = '{{{0}}}entry'.format(_ns['atom'])
+        title_tag = '{{{0}}}title'.format(_ns['atom'])
+
+        channel_name = None
+        feed_items = []
+        response.raw.decode_content = True
+        for _, element in iterparse(response.raw):
+            if element.tag == entry_tag:
+                timestamp = datetime_parser.since_epoch(
+                    datetime_parser.strptime(
+                        element.findtext('atom:published', '', _ns)
+                    )
+                )
+                if timestamp < newest:
+                    break
+                feed_items.append({
+                    'kind': 'youtube#video',
+                    'id': element.findtext('yt:videoId', '', _ns),
+                    'snippet': {
+                        'channelId': channel_id,
+                    },
+                    '_timestamp': timestamp,
+                    '_partial': True,
+                })
+                element.clear()
+            # the channel title precedes the titles of all entries
+            elif channel_name is None and element.tag == title_tag:
+                channel_name = (element.text or '').lower().replace(',', '')
+
+        if channel_name is not None:
+            feed_details['channel_name'] = channel_name
+        if feed_items:
+            feed_details.setdefault('new_items', []).extend(feed_items)
+            feed_details['newest'] = max(
+                newest, max(map(itemgetter('_timestamp'), feed_items))
+            )
+        feed_details['updated'] = True
+
+    def _get_feed(self, channel_id, feed_details):
+        headers = self.FEED_HEADERS
+        # Only make a conditional request if there are stored items that
+        # can be used if the feed has not been modified
+        if feed_details.get('newest'):
+            last_modified = feed_details.get('last_modified')
+            etag = feed_details.get('etag')
+            if last_modified or etag:
+                headers = headers.copy()
+                if last_modified:
+                    headers['If-Modified-Since'] = last_modified
+                if etag:
+                    headers['If-None-Match'] = etag
+
+        response = self.request(self.FEED_URL + channel_id,
+                                headers=headers,
+                                stream=True)
+        if not response:
+            return
+        try:
+            if response.status_code == 304:
+                feed_details['status'] = 'unchanged'
+                feed_details['updated'] = True
+                return
+            self._parse_feed(channel_id, feed_details, response)
+            feed_details['last_modified'] = (
+                response.headers.get('Last-Modified')
+            )
+            feed_details['etag'] = response.headers.get('ETag')
+            feed_details['status'] = 'updated'
+        finally:
+            response.close()
+
+    def _wait_for_feeds(self, feeds, tasks):
+        """
+        Waits for feed requests to complete and stores the updated feeds
+        """
+        self._context.get_thread_pool().wait(tasks)
+        for task in tasks:
+            try:
+                task.result()
+            except Exception as exc:
+                self._context.log_error('get_my_subscriptions error: |{exc}|'
+                                        .format(exc=exc))
+
+        if tasks:
+            statuses = Counter(feed.get('status') for feed in feeds.values())
+            self._context.log_debug('get_my_subscriptions - feeds requested: '
+                                    '{requested}, unchanged: {unchanged}, '
+                                    'updated: {updated}, failed: {failed}'
+                                    .format(
+                requested=len(tasks),
+                unchanged=statuses['unchanged'],
+                updated=statuses['updated'],
+                failed=(len(tasks)
+                        - statuses['unchanged']
+                        - statuses['updated']),
+            ))
+
+        self._store_feeds(feeds)
+
+    def _store_feeds(self, feeds):
+        cache = self._context.get_feed_history()
+        cache.set_feed_items({
+            channel_id: feed.pop('new_items')
+            for channel_id, feed in feeds.items()
+            if feed.get('new_items')
+        })
+        new_cache = {
+            channel_id: {
+                'channel_name': feed.get('channel_name'),
+                'newest': feed.get('newest'),
+                'last_modified': feed.get('last_modified'),
+                'etag': feed.get('etag'),
+            }
+            for channel_id, feed in feeds.items()
+            if feed.pop('updated', False)
+        }
+        if new_cache:
+            cache.set_items(new_cache, defer=True)
+
+    @staticmethod
+    def _get_feed_details(cached):
+        """
+        Returns the stored details of a channel feed, moving feed items stored
+        with the details by earlier versions to the feed items table
+        """
+        if not cached:
+            return {
+                'channel_name': None,
+                'newest': None,
+            }
+        feed_details = cached['value']
+        if 'cached_items' in feed_details:
+            feed_items = feed_details.pop('cached_items')
+            if feed_items:
+                feed_details['new_items'] = feed_items
+                feed_details['newest'] = max(
+                    map(itemgetter('_timestamp'), feed_items)
+                )
+            feed_details['updated'] = True
+        return feed_details
+
+    def _get_bookmarked_channel_ids(self):
+        bookmarks = self._context.get_bookmarks_list().get_items()
+        if not bookmarks:
+            return []
+        return [
+            item_id
+            for item_id, item in bookmarks.items()
+            if (isinstance(item, float)
+                or getattr(item, 'get_channel_id', bool)())
+        ]
+
+    def refresh_subscription_feeds(self, logged_in=False, period=60):
+        """
+        Refreshes the least recently refreshed feeds of subscribed and
+        bookmarked channels, in the background. When called every period
+        seconds, an equal share of the feeds is refreshed each time, so that
+        requests are staggered and every feed is refreshed about once every
+        FEED_MAX_AGE seconds. Returns the number of feeds requested.
+        """
+        channel_ids = set(self._get_bookmarked_channel_ids())
+        if logged_in:
+            data_cache = self._context.get_data_cache()
+            subscriptions = data_cache.get_item(self.SUBSCRIPTIONS_CACHE_KEY)
+            if subscriptions:
+                channel_ids.update(subscriptions)
+        if not channel_ids:
+            return 0
+
+        cached = self._context.get_feed_history().get_items(channel_ids)
+        max_age = self.FEED_MAX_AGE - period
+        # feeds that have never been retrieved are refreshed first
+        never = float('inf')
+        stale = sorted([
+            (cached[channel_id]['age'] if channel_id in cached else never,
+             channel_id)
+            for channel_id in channel_ids
+            if channel_id not in cached or cached[channel_id]['age'] > max_age
+        ], reverse=True)
+        num_feeds = -(-len(channel_ids) * period // self.FEED_MAX_AGE)
+
+        thread_pool = self._context.get_thread_pool()
+        feeds = {}
+        tasks = []
+        for _, channel_id in stale[:num_feeds]:
+            feed_details = self._get_feed_details(cached.get(channel_id))
+            feeds[channel_id] = feed_details
+            tasks.append(thread_pool.submit(
+                self._get_feed, channel_id, feed_details
+            ))
+        self._wait_for_feeds(feeds, tasks)
+        return len(tasks)
+
     def get_my_subscriptions(self,
                              page_token=1,
                              logged_in=False,
@@ -1476,346 +1793,121 @@ class YouTube(LoginClient):
         else:
             subscription_filters = None
 
-        page = page_token or 1
-        totals = {
-            'num': 0,
-            'start': -self._max_results,
-            'end': page * self._max_results,
-            'video_ids': set(),
-        }
-        totals['start'] += totals['end']
-
-        def _sort_by_date_time(item, limits):
-            video_id = item['id']
-            if video_id in limits['video_ids']:
-                return -1
-            limits['num'] += 1
-            limits['video_ids'].add(video_id)
-            return item['_timestamp']
-
-        channel_ids = []
-        params = {
-            'part': 'snippet',
-            'maxResults': '50',
-            'order': 'alphabetical',
-            'mine': 'true'
-        }
-
-        def _get_channels(_params=params):
-            if not _params or 'complete' in _params:
-                return None, None
-            json_data = self.api_request(method='GET',
-                                         path='subscriptions',
-                                         params=_params,
-                                         **kwargs)
-            if not json_data:
-                return None, None
-
-            subs_page_token = json_data.get('nextPageToken')
-            if subs_page_token:
-                _params['pageToken'] = subs_page_token
-            else:
-                _params['complete'] = True
-
-            return 'list_list', [{
-                'channel_id': item['snippet']['resourceId']['channelId']
-            } for item in json_data.get('items', [])]
-
-        bookmarks = self._context.get_bookmarks_list().get_items()
-        if bookmarks:
-            channel_ids.extend([
-                {'channel_id': item_id}
-                for item_id, item in bookmarks.items()
-                if (isinstance(item, float)
-                    or getattr(item, 'get_channel_id', bool)())
-            ])
+        # When feeds are refreshed in the background by the service, cached
+        # feeds are used as is, unless they have not been refreshed recently,
+        # which only happens if the service has not been running
+        background_refresh = settings.subscriptions_background_refresh()
+        if refresh:
+            max_age = 0
+        elif background_refresh:
+            max_age = 2 * self.FEED_MAX_AGE
+        else:
+            max_age = self.FEED_MAX_AGE
 
+        thread_pool = self._context.get_thread_pool()
         feeds = {}
-        headers = {
-            'Host': 'www.youtube.com',
-            'Connection': 'keep-alive',
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'
-                          ' AppleWebKit/537.36 (KHTML, like Gecko)'
-                          ' Chrome/87.0.4280.66 Safari/537.36',
-            'Accept': 'text/html,'
-                      'application/xhtml+xml,'
-                      'application/xml;q=0.9,'
-                      'image/webp,*/*;q=0.8',
-            'DNT': '1',
-            'Accept-Encoding': 'gzip, deflate',
-            'Accept-Language': 'en-US,en;q=0.7,de;q=0.3'
-        }
-
-        def _get_feed_cache(channel_id, _cache=cache, _refresh=refresh):
-            cached = _cache.get_item(channel_id)
-            if cached:
-                feed_details = cached['value']
-                _refresh = _refresh or cached['age'] > _cache.ONE_HOUR
-            else:
-                feed_details = {
-                    'channel_name': None,
-                    'cached_items': None,
-                }
-                _refresh = True
-
-            if _refresh:
-                feed_details['refresh'] = True
-
-            return 'dict_dict_dict', (channel_id, feed_details)
-
-        def _get_feed(channel_id, _headers=headers):
-            return 'dict_dict_dict', (channel_id, {
-                'content': self.request(
-                    'https://www.youtube.com/feeds/videos.xml?channel_id='
-                    + channel_id,
-                    headers=_headers,
-                ),
-                'refresh': True,
-            })
-
-        namespaces = {
-            'atom': 'http://www.w3.org/2005/Atom',
-            'yt': 'http://www.youtube.com/xml/schemas/2015',
-            'media': 'http://search.yahoo.com/mrss/',
-        }
-
-        def _parse_feeds(feeds,
-                         encode=not current_system_version.compatible(19, 0),
-                         filters=subscription_filters,
-                         _ns=namespaces,
-                         _cache=cache):
-            all_items = {}
-            new_cache = {}
-            for channel_id, feed in feeds.items():
-                channel_name = feed.get('channel_name')
-                cached_items = feed.get('cached_items')
-                refresh_feed = feed.get('refresh')
-                content = feed.get('content')
-
-                if refresh_feed and content:
-                    content.encoding = 'utf-8'
-                    content = to_unicode(content.content).replace('\n', '')
-
-                    root = ET.fromstring(to_str(content) if encode else content)
-                    channel_name = (root.findtext('atom:title', '', _ns)
-                                    .lower().replace(',', ''))
-                    feed_items = [{
-                        'kind': 'youtube#video',
-                        'id': item.findtext('yt:videoId', '', _ns),
-                        'snippet': {
-                            'channelId': channel_id,
-                        },
-                        '_timestamp': datetime_parser.since_epoch(
-                            datetime_parser.strptime(
-                                item.findtext('atom:published', '', _ns)
-                            )
-                        ),
-                        '_partial': True,
-                    } for item in root.findall('atom:entry', _ns)]
-                else:
-                    feed_items = []
-
-                if feed_items:
-                    if cached_items:
-                        feed_items.extend(cached_items)
-                    feed_limits = {
-                        'num': 0,
-                        'video_ids': set(),
-                    }
-                    feed_items.sort(reverse=True,
-                                    key=partial(_sort_by_date_time,
-                                                limits=feed_limits))
-                    feed_items = feed_items[:min(1000, feed_limits['num'])]
-                    new_cache[channel_id] = {
-                        'channel_name': channel_name,
-                        'cached_items': feed_items,
-                    }
-                elif cached_items:
-                    feed_items = cached_items
-                else:
+        tasks = []
+
+        def _get_feeds(channel_ids, _cache=cache, _max_age=max_age):
+            channel_ids = [channel_id
+                           for channel_id in channel_ids
+                           if channel_id not in feeds]
+            if not channel_ids:
+                return
+            cached = _cache.get_items(channel_ids)
+
+            for channel_id in channel_ids:
+                if channel_id in feeds:
                     continue
-                if filters:
-                    filtered = channel_name and channel_name in filters['set']
-                    if filters['blacklist']:
-                        if not filtered:
-                            all_items[channel_id] = feed_items
-                    elif filtered:
-                        all_items[channel_id] = feed_items
-                else:
-                    all_items[channel_id] = feed_items
-
-            if new_cache:
-                _cache.set_items(new_cache)
-            return list(chain.from_iterable(all_items.values()))
-
-        def _threaded_fetch(kwargs,
-                            output,
-                            worker,
-                            threads,
-                            pool_id,
-                            dynamic,
-                            input_wait,
-                            **_kwargs):
-            while not threads['balance'].is_set():
-                if kwargs is True:
-                    _kwargs = {}
-                elif kwargs:
-                    _kwargs = kwargs.pop()
-                elif input_wait:
-                    input_wait.acquire(True)
-                    input_wait.release()
-                    if kwargs:
-                        continue
-                    break
-                else:
+                feed_details = self._get_feed_details(cached.get(channel_id))
+                refresh_feed = (channel_id not in cached
+                                or cached[channel_id]['age'] >= _max_age)
+                feeds[channel_id] = feed_details
+
+                # Feeds are fetched in the background as soon as the channel
+                # is known, while further pages of subscriptions are requested
+                if refresh_feed:
+                    tasks.append(thread_pool.submit(
+                        self._get_feed, channel_id, feed_details
+                    ))
+
+        _get_feeds(self._get_bookmarked_channel_ids())
+
+        # The list of subscribed channels is kept so that feeds can still be
+        # retrieved using RSS, without the Data API, when quota is running low,
+        # and so that feeds can be refreshed in the background by the service
+        data_cache = self._context.get_data_cache()
+        if logged_in:
+            if self.is_quota_low():
+                subscriptions = data_cache.get_item(
+                    self.SUBSCRIPTIONS_CACHE_KEY
+                )
+            elif background_refresh and not refresh:
+                subscriptions = data_cache.get_item(
+                    self.SUBSCRIPTIONS_CACHE_KEY, data_cache.ONE_DAY
+                )
+            else:
+                subscriptions = None
+            if subscriptions:
+                _get_feeds(subscriptions)
+                logged_in = False
+
+        if logged_in:
+            subscriptions = []
+            params = {
+                'part': 'snippet',
+                'maxResults': '50',
+                'order': 'alphabetical',
+                'mine': 'true'
+            }
+            while 1:
+                json_data = self.api_request(method='GET',
+                                             path='subscriptions',
+                                             params=params,
+                                             **kwargs)
+                if not json_data:
+                    subscriptions = None
                     break
-
-                try:
-                    output_type, _output = worker(**_kwargs)
-                except Exception as exc:
-                    self._context.log_error('threaded_fetch error: |{exc}|'
-                                            .format(exc=exc))
-                    continue
-
-                if not output_type:
+                channel_ids = [
+                    item['snippet']['resourceId']['channelId']
+                    for item in json_data.get('items', [])
+                ]
+                subscriptions.extend(channel_ids)
+                _get_feeds(channel_ids)
+                subs_page_token = json_data.get('nextPageToken')
+                if not subs_page_token:
                     break
-                if output_type == 'value_dict':
-                    output[_output[0]] = _output[1]
-                elif output_type == 'dict_dict':
-                    output.update(_output)
-                elif output_type == 'value_list':
-                    output.append(_output)
-                elif output_type == 'list_list':
-                    output.extend(_output)
-                elif output_type == 'value_list_dict':
-                    if _output[0] not in output:
-                        output[_output[0]] = []
-                    output[_output[0]].append(_output[1])
-                elif output_type == 'list_list_dict':
-                    if _output[0] not in output:
-                        output[_output[0]] = []
-                    output[_output[0]].extend(_output[1])
-                elif output_type == 'dict_dict_dict':
-                    if _output[0] not in output:
-                        output[_output[0]] = {}
-                    output[_output[0]].update(_output[1])
-            else:
-                threads['balance'].clear()
-
-            thread = threading.current_thread()
-            threads['available'].release()
-            if dynamic:
-                threads['pool_counts'][pool_id] -= 1
-            threads['pool_counts']['all'] -= 1
-            threads['current'].discard(thread)
-
-        try:
-            num_cores = cpu_count() or 1
-        except NotImplementedError:
-            num_cores = 1
-        max_threads = min(32, 2 * (num_cores + 4))
-        threads = {
-            'max': max_threads,
-            'available': threading.Semaphore(max_threads),
-            'current': set(),
-            'pool_counts': {
-                'all': 0,
-            },
-            'balance': threading.Event(),
-        }
-        payloads = [
-            {
-                'pool_id': 1,
-                'kwargs': True,
-                'output': channel_ids,
-                'worker': _get_channels,
-                'threads': threads,
-                'limit': 1,
-                'dynamic': False,
-                'input_wait': None,
-            },
-        ] if logged_in else []
-        payloads.extend((
-            {
-                'pool_id': 2,
-                'kwargs': channel_ids,
-                'output': feeds,
-                'worker': _get_feed_cache,
-                'threads': threads,
-                'limit': 1,
-                'dynamic': False,
-                'input_wait': threading.Lock(),
-            },
-            {
-                'pool_id': 3,
-                'kwargs': channel_ids,
-                'output': feeds,
-                'worker': _get_feed,
-                'threads': threads,
-                'limit': None,
-                'dynamic': True,
-                'input_wait': threading.Lock(),
-            },
-        ))
-        while 1:
-            for payload in payloads:
-                pool_id = payload['pool_id']
-                if pool_id in threads['pool_counts']:
-                    current_num = threads['pool_counts'][pool_id]
-                else:
-                    current_num = threads['pool_counts'][pool_id] = 0
-
-                input_wait = payload['input_wait']
-                if payload['kwargs']:
-                    if input_wait and input_wait.locked():
-                        input_wait.release()
-                else:
-                    continue
-
-                available = threads['max'] - threads['pool_counts']['all']
-                limit = payload['limit']
-                if limit:
-                    if current_num >= limit:
-                        continue
-                    if not available:
-                        threads['balance'].set()
-                elif not available:
-                    continue
+                params['pageToken'] = subs_page_token
+            if subscriptions is not None:
+                data_cache.set_item(self.SUBSCRIPTIONS_CACHE_KEY,
+                                    subscriptions)
 
-                thread = threading.Thread(
-                    target=_threaded_fetch,
-                    kwargs=payload,
-                )
-                thread.daemon = True
-                threads['current'].add(thread)
-                threads['pool_counts'][pool_id] += 1
-                threads['pool_counts']['all'] += 1
-                threads['available'].acquire(True)
-                thread.start()
-
-            if not threads['current']:
-                break
-
-        for thread in threads['current']:
-            if thread and thread.is_alive():
-                thread.join(30)
+        self._wait_for_feeds(feeds, tasks)
 
-        items = _parse_feeds(feeds)
-
-        # filter, sorting by publish date and trim
-        if items:
-            items.sort(reverse=True,
-                       key=partial(_sort_by_date_time,
-                                   limits=totals))
-        else:
+        # Feed items are read from the feed items table, newest first, one
+        # page at a time, with the channel filter applied by the query
+        page = page_token or 1
+        rows = cache.get_feed_items(
+            {channel_id: feed.get('channel_name')
+             for channel_id, feed in feeds.items()},
+            filters=subscription_filters,
+            offset=(page - 1) * self._max_results,
+            limit=self._max_results + 1,
+        )
+        if not rows:
             return None
-
-        if totals['num'] > totals['end']:
+        if len(rows) > self._max_results:
             v3_response['nextPageToken'] = page + 1
-        if totals['num'] > totals['start']:
-            items = items[totals['start']:min(totals['num'], totals['end'])]
-        else:
-            return None
+
+        items = [{
+            'kind': 'youtube#video',
+            'id': video_id,
+            'snippet': {
+                'channelId': channel_id,
+            },
+            '_timestamp': published,
+            '_partial': True,
+        } for channel_id, video_id, published in rows[:self._max_results]]
 
         v3_response['items'] = items
         return v3_response
@@ -1978,6 +2070,11 @@ class YouTube(LoginClient):
                                 'headers: |{0.headers}|'.format(response))
         if response.status_code == 204 and 'no_content' in kwargs:
             return True
+        if response.status_code == 304 and kwargs.get('etag'):
+            return {
+                'etag': kwargs['etag'],
+                '_not_modified': True,
+            }
         try:
             json_data = response.json()
             if 'error' in json_data:
@@ -2047,7 +2144,17 @@ class YouTube(LoginClient):
                     post_data=None,
                     headers=None,
                     no_login=False,
+                    etag=None,
                     **kwargs):
+        """
+        If etag is provided, the request is made conditional on the resource
+        having changed. An unchanged resource returns a response of
+        {'etag': etag, '_not_modified': True} rather than the full resource.
+        """
+        if etag:
+            headers = dict(headers or {}, **{'If-None-Match': etag})
+            kwargs['etag'] = etag
+
         client_data = {
             '_endpoint': path.strip('/'),
             'method': method,
@@ -2080,38 +2187,47 @@ class YouTube(LoginClient):
         if clear_data and 'json' in client:
             del client['json']
 
-        params = client.get('params')
-        if params:
-            log_params = deepcopy(params)
-            if 'location' in log_params:
-                log_params['location'] = '|xx.xxxx,xx.xxxx|'
-            if 'key' in log_params:
-                key = log_params['key']
-                log_params['key'] = '...'.join((key[:3], key[-3:]))
-        else:
-            log_params = None
+        if version == 3:
+            quota_key = self._get_quota_key()
+            if quota_key:
+                self._context.get_quota_ledger().record(quota_key,
+                                                        method,
+                                                        client['_endpoint'])
+
+        # only redact and log request details if debug logging is enabled
+        if self._context.get_settings().logging_enabled():
+            params = client.get('params')
+            if params:
+                log_params = params.copy()
+                if 'location' in log_params:
+                    log_params['location'] = '|xx.xxxx,xx.xxxx|'
+                if 'key' in log_params:
+                    key = log_params['key']
+                    log_params['key'] = '...'.join((key[:3], key[-3:]))
+            else:
+                log_params = None
 
-        headers = client.get('headers')
-        if headers:
-            log_headers = deepcopy(headers)
-            if 'Authorization' in log_headers:
-                log_headers['Authorization'] = '|logged in|'
-        else:
-            log_headers = None
-
-        self._context.log_debug('API request:\n'
-                                'version: |{version}|\n'
-                                'method: |{method}|\n'
-                                'path: |{path}|\n'
-                                'params: |{params}|\n'
-                                'post_data: |{data}|\n'
-                                'headers: |{headers}|'
-                                .format(version=version,
-                                        method=method,
-                                        path=path,
-                                        params=log_params,
-                                        data=client.get('json'),
-                                        headers=log_headers))
+            headers = client.get('headers')
+            if headers:
+                log_headers = headers.copy()
+                if 'Authorization' in log_headers:
+                    log_headers['Authorization'] = '|logged in|'
+            else:
+                log_headers = None
+
+            self._context.log_debug('API request:\n'
+                                    'version: |{version}|\n'
+                                    'method: |{method}|\n'
+                                    'path: |{path}|\n'
+                                    'params: |{params}|\n'
+                                    'post_data: |{data}|\n'
+                                    'headers: |{headers}|'
+                                    .format(version=version,
+                                            method=method,
+                                            path=path,
+                                            params=log_params,
+                                            data=client.get('json'),
+                                            headers=log_headers))
         response = self.request(response_hook=self._response_hook,
                                 response_hook_kwargs=kwargs,
                                 error_hook=self._error_hook,
@@ -243,9 +243,59 @@ class CalculateN(object):
         (r"for\(var \w=\w\.length;\w;\)\w\.push\(\w\.splice\(--\w,1\)\[0\]\)}", throttling_reverse),  # noqa:E501
     )
 
-    def __init__(self, js):
-        self.calculated_n = None
-        self.throttling_function_code = self.get_throttling_function_code(js)
+    # Tags of the serialisable throttling array elements
+    ARRAY_VALUE = 0
+    ARRAY_FUNCTION = 1
+    ARRAY_SELF = 2
+    ARRAY_N = 3
+
+    FUNCTIONS = {fn.__name__: fn for _, fn in MAPPING_FUNC_PATTERNS}
+
+    def __init__(self, js=None, plan=None):
+        """
+        :param str js:
+            The contents of the 'base.js' asset file. Only used if plan is not
+            provided.
+        :param dict plan:
+            A throttling plan previously created by get_throttling_plan(js).
+        """
+        if plan is None and js:
+            plan = self.get_throttling_plan(js)
+        if plan:
+            self._steps = tuple(tuple(step) for step in plan['steps'])
+            self._array = tuple(
+                (tag, self.FUNCTIONS[value] if tag == self.ARRAY_FUNCTION
+                 else value)
+                for tag, value in plan['array']
+            )
+        else:
+            self._steps = self._array = None
+        self._calculated = {}
+
+    @classmethod
+    def get_throttling_plan(cls, js):
+        """Extract the throttling plan and array from the player JavaScript
+        in a serialisable form, so that the result can be cached and reused
+        without having to parse the JavaScript again.
+        :param str js:
+            The contents of the 'base.js' asset file.
+        :returns:
+            A dict with the 'steps' of the plan, as lists of integer indices
+            into the throttling array, and the tagged elements of the 'array',
+            or None if the throttling function could not be parsed.
+        """
+        raw_code = cls.get_throttling_function_code(js)
+        if not raw_code:
+            return None
+        try:
+            return {
+                'steps': [[int(index) for index in step]
+                          for step in cls.get_throttling_plan_gen(raw_code)],
+                'array': cls.get_throttling_function_array(raw_code),
+            }
+        except:
+            logger.log_debug('ratebypass: unable to parse throttling function')
+            return None
 
     @staticmethod
     def get_throttling_function_code(js):
@@ -351,15 +401,16 @@ class CalculateN(object):
                     yield piece
 
     @classmethod
-    def get_throttling_function_array(cls, mutable_n_list, raw_code):
+    def get_throttling_function_array(cls, raw_code):
         """Extract the 'c' array that comes with values and functions
         used to unscramble the initial 'n' value.
-        :param list mutable_n_list:
-            Mutable list with the characters of the 'initial n' value.
         :param str raw_code:
             The response from get_throttling_function_code(js).
         :returns:
-            The array of various integers, arrays, and functions.
+            The array of various integers, strings, and functions, as
+            (tag, value) tuples that can be serialised. Functions are
+            referenced by name, and references to the array itself or to the
+            list with the 'initial n' characters are only tagged.
         """
 
         array_start_pattern = ",c=["
@@ -380,7 +431,7 @@ class CalculateN(object):
         converted_array = []
         for el in cls.array_reverse_split_gen(array_code):
             try:
-                converted_array.append(int(el))
+                converted_array.append((cls.ARRAY_VALUE, int(el)))
                 continue
             except ValueError:
                 # Not an integer value.
@@ -388,19 +439,20 @@ class CalculateN(object):
 
             if el == 'null':
                 # Replace null elements in this array with references to itself.
-                converted_array.append(converted_array)
+                converted_array.append((cls.ARRAY_SELF, None))
                 continue
 
             if el[0] == '"' or el[0] == "'":
                 # Strip quotation marks in string elements.
-                converted_array.append(el.strip('\'"'))
+                converted_array.append((cls.ARRAY_VALUE, el.strip('\'"')))
                 continue
 
             if el.startswith('function'):
                 found = False
                 for pattern, fn in cls.MAPPING_FUNC_PATTERNS:
                     if re.search(pattern, el):
-                        converted_array.append(fn)
+                        converted_array.append((cls.ARRAY_FUNCTION,
+                                                fn.__name__))
                         found = True
                         break
                 else:
@@ -411,61 +463,72 @@ class CalculateN(object):
 
             # Probably the single 'b' references (references to the list with
             # initial 'n' characters).
-            converted_array.append(mutable_n_list)
+            converted_array.append((cls.ARRAY_N, None))
 
-        # Reverse in-place (instead of using a [::-1] slice), important as
-        # there are references to this array within itself.
         converted_array.reverse()
         return converted_array
 
-    def calculate_n(self, mutable_n_list):
+    def calculate_n(self, initial_n):
         """Converts n to the correct value to prevent throttling.
-        :param list mutable_n_list:
-            A list with the characters of the initial 'n' string. This list
-            will be modified by this function.
+        Results are memoised, so the plan is only run once for each initial
+        value of n.
+        :param str|list initial_n:
+            The initial 'n' string, or a list of strings that make up the
+            initial 'n' string.
         :returns:
             The new value of 'n' as a string, to replace the value in the
             video stream URL.
         """
-        if self.calculated_n:
+        initial_n_string = ''.join(initial_n)
+        calculated_n = self._calculated.get(initial_n_string)
+        if calculated_n:
             logger.log_debug('`n` already calculated: {calculated_n}. returning early...'
-                             .format(calculated_n=self.calculated_n))
-            return self.calculated_n
+                             .format(calculated_n=calculated_n))
+            return calculated_n
 
-        if not self.throttling_function_code:
+        if not self._steps:
             return None
 
-        initial_n_string = ''.join(mutable_n_list)
         logger.log_debug('Attempting to calculate `n` from initial: {initial_n}'
                          .format(initial_n=initial_n_string))
 
+        # Create the throttling array from its tagged elements. The array has
+        # to be recreated every time as the plan modifies it, as well as the
+        # list with the initial 'n' characters that it references.
+        mutable_n_list = list(initial_n_string)
+        throttling_array = []
+        throttling_array.extend([
+            value if tag < self.ARRAY_SELF
+            else throttling_array if tag == self.ARRAY_SELF
+            else mutable_n_list
+            for tag, value in self._array
+        ])
+
         # For each step in the plan, get the first item of the step as the
         # index of the function to call, and then call that function using
         # the throttling array elements indexed by the remaining step items.
         try:
-            throttling_array = self.get_throttling_function_array(
-                mutable_n_list,
-                self.throttling_function_code)
-            for step in self.get_throttling_plan_gen(self.throttling_function_code):
-                curr_func = throttling_array[int(step[0])]
+            for step in self._steps:
+                curr_func = throttling_array[step[0]]
                 if not callable(curr_func):
                     logger.log_debug('{curr_func} is not callable.'.format(curr_func=curr_func))
                     logger.log_debug('Throttling array:\n{throttling_array}\n'
                                      .format(throttling_array=throttling_array))
                     return None
 
-                first_arg = throttling_array[int(step[1])]
+                first_arg = throttling_array[step[1]]
 
                 if len(step) == 2:
                     curr_func(first_arg)
                 elif len(step) == 3:
-                    second_arg = throttling_array[int(step[2])]
+                    second_arg = throttling_array[step[2]]
                     curr_func(first_arg, second_arg)
         except:
             logger.log_debug('Error calculating new `n`')
             return None
 
-        self.calculated_n = ''.join(mutable_n_list)
+        calculated_n = ''.join(mutable_n_list)
+        self._calculated[initial_n_string] = calculated_n
         logger.log_debug('Calculated `n`: {calculated_n}'
-                         .format(calculated_n=self.calculated_n))
-        return self.calculated_n
+                         .format(calculated_n=calculated_n))
+        return calculated_n
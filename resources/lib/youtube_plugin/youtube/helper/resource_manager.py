@@ -10,15 +10,23 @@
 
 from __future__ import absolute_import, division, unicode_literals
 
+import json
+from threading import Event
+
+from ...kodion.compatibility import Queue
+
 
 class ResourceManager(object):
     def __init__(self, provider, context):
         self._context = context
+        settings = context.get_settings()
         fanart_type = context.get_param('fanart_type')
         if fanart_type is None:
-            fanart_type = context.get_settings().fanart_selection()
+            fanart_type = settings.fanart_selection()
         self._fanart_type = fanart_type
         self._provider = provider
+        self._thread_pool = context.get_thread_pool()
+        self._concurrency = settings.concurrent_requests()
         self.new_data = {}
 
     def context_changed(self, context):
@@ -31,6 +39,17 @@ class ResourceManager(object):
         for i in range(0, len(input_list), n):
             yield input_list[i:i + n]
 
+    def _get_batches(self, func, ids, *args, **kwargs):
+        """
+        Requests data for ids in batches of 50, concurrently if there is more
+        than one batch. Results are returned in the same order as the batches.
+        """
+        return self._thread_pool.map(
+            lambda list_of_50: func(list_of_50, *args, **kwargs),
+            self._list_batch(ids, n=50),
+            max_workers=self._concurrency,
+        )
+
     def get_channels(self, ids, defer_cache=False):
         client = self._provider.get_client(self._context)
         data_cache = self._context.get_data_cache()
@@ -75,8 +94,7 @@ class ResourceManager(object):
                                     .format(ids=list(result)))
 
         if to_update:
-            new_data = [client.get_channels(list_of_50)
-                        for list_of_50 in self._list_batch(to_update, n=50)]
+            new_data = self._get_batches(client.get_channels, to_update)
             if not any(new_data):
                 new_data = None
         else:
@@ -151,8 +169,7 @@ class ResourceManager(object):
 
         if to_update:
             client = self._provider.get_client(self._context)
-            new_data = [client.get_playlists(list_of_50)
-                        for list_of_50 in self._list_batch(to_update, n=50)]
+            new_data = self._get_batches(client.get_playlists, to_update)
             if not any(new_data):
                 new_data = None
         else:
@@ -181,87 +198,190 @@ class ResourceManager(object):
 
         return result
 
-    def get_playlist_items(self, ids=None, batch_id=None, defer_cache=False):
+    def get_playlist_items(self,
+                           ids=None,
+                           batch_id=None,
+                           defer_cache=False,
+                           stream=False):
+        """
+        Returns pages of items for the requested playlists, keyed by
+        (playlist_id, page_token), in playlist and page order.
+
+        If stream is True, a generator of (batch_id, batch) tuples is returned
+        instead, which yields each page as soon as it is available, while the
+        remaining pages continue to be fetched in the background.
+        """
         if not ids and not batch_id:
             return None
 
+        batches = self._get_playlist_pages(ids, batch_id, defer_cache)
+        if stream:
+            return batches
+        return {
+            batch_id: batch
+            for batch_id, batch in batches
+        }
+
+    def _get_playlist_pages(self, ids, batch_id, defer_cache):
         refresh = self._context.get_param('refresh')
 
         if batch_id:
             ids = [batch_id[0]]
-            page_token = batch_id[1]
+            start_token = batch_id[1]
             fetch_next = False
         else:
-            page_token = None
+            start_token = 0
             fetch_next = True
 
         data_cache = self._context.get_data_cache()
-        batch_ids = []
-        to_update = []
-        result = {}
+        playlist_ids = []
+        cached = {}
+        stored = {}
+        to_update = {}
         for playlist_id in ids:
-            page_token = page_token or 0
+            if playlist_id in cached:
+                continue
+            playlist_ids.append(playlist_id)
+            cached[playlist_id] = pages = []
+
+            # Read all stored pages of the playlist in a single query, rather
+            # than one query per page token. Expired pages are kept, to be
+            # revalidated using their etag rather than fetched again in full.
+            if fetch_next:
+                rows = data_cache.get_items_like('{0},%'.format(playlist_id))
+            else:
+                rows = {}
+            stored[playlist_id] = rows
+
+            page_token = start_token or 0
             while 1:
                 batch_id = (playlist_id, page_token)
-                batch_ids.append(batch_id)
-                if refresh:
-                    batch = None
+                max_age = (data_cache.ONE_HOUR if page_token
+                           else data_cache.ONE_MINUTE * 5)
+                key = '{0},{1}'.format(*batch_id)
+                if key in rows:
+                    row = rows[key]
                 else:
-                    batch = data_cache.get_item(
-                        '{0},{1}'.format(*batch_id),
-                        data_cache.ONE_HOUR if page_token
-                        else data_cache.ONE_MINUTE * 5
-                    )
-                if not batch:
-                    to_update.append(batch_id)
+                    # pages that have not yet been written to the database
+                    row = data_cache.get_item(key, as_dict=True)
+                    if row:
+                        rows[key] = row
+                if not row or refresh or row['age'] > max_age:
+                    to_update[playlist_id] = page_token
                     break
-                result[batch_id] = batch
+                batch = row['value']
+                pages.append((batch_id, batch))
                 page_token = batch.get('nextPageToken') if fetch_next else None
                 if page_token is None:
                     break
 
-        if result:
+        cached_ids = [batch_id
+                      for pages in cached.values()
+                      for batch_id, _ in pages]
+        if cached_ids:
             self._context.log_debug('Found cached items for playlists:\n|{ids}|'
-                                    .format(ids=list(result)))
+                                    .format(ids=cached_ids))
+
+        # Page tokens are only known once the previous page has been received,
+        # so pages of each playlist are fetched in sequence, but all playlists
+        # are fetched concurrently, starting before any pages are returned.
+        # Fetches not yet started by a worker of the shared pool are run in
+        # this thread once their pages are needed, and fetches are stopped if
+        # the generator is closed before all pages have been returned.
+        thread_pool = self._context.get_thread_pool()
+        if to_update:
+            client = self._provider.get_client(self._context)
+            stop = Event()
+            fetches = {
+                playlist_id: self._fetch_playlist_pages(thread_pool,
+                                                        client,
+                                                        playlist_id,
+                                                        page_token,
+                                                        fetch_next,
+                                                        stored[playlist_id],
+                                                        stop)
+                for playlist_id, page_token in to_update.items()
+            }
+        else:
+            stop = None
+            fetches = {}
 
-        client = self._provider.get_client(self._context)
         new_data = {}
-        insert_point = 0
-        for playlist_id, page_token in to_update:
-            new_batch_ids = []
-            batch_id = (playlist_id, page_token)
-            insert_point = batch_ids.index(batch_id, insert_point)
-            while 1:
-                batch_id = (playlist_id, page_token)
-                new_batch_ids.append(batch_id)
-                batch = client.get_playlist_items(*batch_id)
-                new_data[batch_id] = batch
-                page_token = batch.get('nextPageToken') if fetch_next else None
-                if page_token is None:
-                    batch_ids[insert_point:insert_point] = new_batch_ids
-                    insert_point += len(new_batch_ids)
-                    break
-
-        if new_data:
-            to_update = list(new_data)
-            self._context.log_debug('Got items for playlists:\n|{ids}|'
-                                    .format(ids=to_update))
-            result.update(new_data)
-            self.cache_data({
-                '{0},{1}'.format(*batch_id): batch
-                for batch_id, batch in new_data.items()
-            }, defer=defer_cache)
+        not_modified = {}
+        try:
+            for playlist_id in playlist_ids:
+                for page in cached[playlist_id]:
+                    yield page
+
+                if playlist_id not in fetches:
+                    continue
+                task, pages = fetches[playlist_id]
+                thread_pool.run_pending(task)
+                while 1:
+                    page = pages.get()
+                    if page is None:
+                        break
+                    batch_id, batch, unchanged = page
+                    if unchanged:
+                        not_modified[batch_id] = batch
+                    else:
+                        new_data[batch_id] = batch
+                    yield batch_id, batch
+                task.result()
+        finally:
+            if stop:
+                stop.set()
+            if not_modified:
+                for batch_id in not_modified:
+                    data_cache.refresh_item('{0},{1}'.format(*batch_id))
+                self._context.log_debug('Playlist items not modified:\n'
+                                        '|{ids}|\n'
+                                        'Saved: |{size} bytes|'
+                                        .format(ids=list(not_modified),
+                                                size=sum(
+                                                    len(json.dumps(batch))
+                                                    for batch
+                                                    in not_modified.values()
+                                                )))
+            if new_data:
+                self._context.log_debug('Got items for playlists:\n|{ids}|'
+                                        .format(ids=list(new_data)))
+                self.cache_data({
+                    '{0},{1}'.format(*batch_id): batch
+                    for batch_id, batch in new_data.items()
+                }, defer=defer_cache)
 
-        # Re-sort result to match order of requested IDs
-        # Will only work in Python v3.7+
-        if list(result) != batch_ids[:len(result)]:
-            result = {
-                batch_id: result[batch_id]
-                for batch_id in batch_ids
-                if batch_id in result
-            }
-
-        return result
+    @staticmethod
+    def _fetch_playlist_pages(thread_pool,
+                              client,
+                              playlist_id,
+                              page_token,
+                              fetch_next,
+                              stored,
+                              stop):
+        pages = Queue()
+
+        def _fetch(page_token):
+            try:
+                while not stop.is_set():
+                    batch_id = (playlist_id, page_token)
+                    row = stored.get('{0},{1}'.format(*batch_id))
+                    etag = row and row['value'].get('etag')
+                    batch = client.get_playlist_items(*batch_id, etag=etag)
+                    if not batch:
+                        break
+                    unchanged = batch and batch.get('_not_modified')
+                    if unchanged:
+                        batch = row['value']
+                    pages.put((batch_id, batch, unchanged))
+                    page_token = (batch.get('nextPageToken') if fetch_next
+                                  else None)
+                    if page_token is None:
+                        break
+            finally:
+                pages.put(None)
+
+        return thread_pool.submit(_fetch, page_token), pages
 
     def get_related_playlists(self, channel_id, defer_cache=False):
         result = self.get_channels((channel_id,), defer_cache=defer_cache)
@@ -303,11 +423,11 @@ class ResourceManager(object):
         if to_update:
             notify_and_raise = not suppress_errors
             client = self._provider.get_client(self._context)
-            new_data = [client.get_videos(list_of_50,
-                                          live_details,
-                                          notify=notify_and_raise,
-                                          raise_exc=notify_and_raise)
-                        for list_of_50 in self._list_batch(to_update, n=50)]
+            new_data = self._get_batches(client.get_videos,
+                                         to_update,
+                                         live_details,
+                                         notify=notify_and_raise,
+                                         raise_exc=notify_and_raise)
             if not any(new_data):
                 new_data = None
         else:
@@ -355,7 +475,7 @@ class ResourceManager(object):
             data = self.new_data
             flush = True
         if data:
-            self._context.get_data_cache().set_items(data)
+            self._context.get_data_cache().set_items(data, defer=True)
             self._context.log_debug('Cached data for items:\n|{ids}|'
                                     .format(ids=list(data)))
         if flush:
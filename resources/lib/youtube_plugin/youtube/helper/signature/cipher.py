@@ -11,31 +11,89 @@
 from __future__ import absolute_import, division, unicode_literals
 
 import re
+from functools import partial
+from hashlib import md5
 
-from .json_script_engine import JsonScriptEngine
+
+def _slice(signature, end):
+    del signature[end:]
+
+
+def _splice(signature, start, count):
+    del signature[start:start + count]
+
+
+def _swap(signature, index):
+    index %= len(signature)
+    signature[0], signature[index] = signature[index], signature[0]
 
 
 class Cipher(object):
-    def __init__(self, context, javascript):
+    # Compiled signature functions, keyed by a hash of the URL of the player
+    # JavaScript they were extracted from, shared by all instances
+    _signature_functions = {}
+
+    def __init__(self, context, javascript, url=None):
         self._context = context
         self._verify = context.get_settings().verify_ssl()
         self._javascript = javascript
+        self._key = md5((url or javascript).encode('utf-8')).hexdigest()
 
         self._object_cache = {}
 
     def get_signature(self, signature):
-        function_cache = self._context.get_function_cache()
-        json_script = function_cache.run(self._load_javascript,
-                                         function_cache.ONE_DAY,
-                                         javascript=self._javascript)
-
-        if json_script:
-            json_script_engine = JsonScriptEngine(json_script)
-            return json_script_engine.execute(signature)
+        signature_function = Cipher._signature_functions.get(self._key)
+        if not signature_function:
+            function_cache = self._context.get_function_cache()
+            json_script = function_cache.run(self._load_javascript,
+                                             function_cache.ONE_DAY,
+                                             key=self._key)
+            if not json_script:
+                return ''
+            signature_function = self._compile(json_script['actions'])
+            Cipher._signature_functions[self._key] = signature_function
+
+        return signature_function(signature)
 
-        return ''
-
-    def _load_javascript(self, javascript):
+    @staticmethod
+    def _compile(actions):
+        """
+        Converts the actions of a json_script into a function that applies
+        the equivalent list operations to a signature
+        """
+        operations = []
+        for action in actions:
+            func = action['func']
+            params = action['params']
+            if func == 'reverse':
+                operations.append(list.reverse)
+            elif func == 'slice':
+                operations.append(partial(_slice, end=params[2]))
+            elif func == 'splice':
+                operations.append(partial(_splice,
+                                          start=params[1],
+                                          count=params[2]))
+            elif func == 'swap':
+                operations.append(partial(_swap, index=params[1]))
+            elif func not in {'list', 'join'}:
+                raise Exception('Unknown method: %s' % func)
+        operations = tuple(operations)
+
+        def signature_function(signature):
+            signature = list(signature)
+            for operation in operations:
+                operation(signature)
+            return ''.join(signature)
+
+        return signature_function
+
+    def _load_javascript(self, key):
+        """
+        Extracts the json_script of the signature function from the player
+        JavaScript. key identifies the player JavaScript when caching the
+        result, so that the whole JavaScript is not needed to create the id.
+        """
+        javascript = self._javascript
         function_name = self._find_signature_function_name(javascript)
         if not function_name:
             raise Exception('Signature function not found')
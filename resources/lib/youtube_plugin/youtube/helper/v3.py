@@ -10,8 +10,6 @@
 
 from __future__ import absolute_import, division, unicode_literals
 
-from threading import Thread
-
 from .utils import (
     THUMB_TYPES,
     filter_videos,
@@ -274,7 +272,6 @@ def _process_list_response(provider, context, json_data, item_filter):
                 'suppress_errors': True,
                 'defer_cache': True,
             },
-            'thread': None,
             'updater': update_video_infos,
             'upd_args': (
                 provider,
@@ -289,14 +286,13 @@ def _process_list_response(provider, context, json_data, item_filter):
                 'use_play_data': use_play_data,
                 'item_filter': item_filter,
             },
-            'complete': False,
-            'defer': False,
+            'deferred': False,
+            'depends_on': None,
         },
         2: {
             'fetcher': resource_manager.get_playlists,
             'args': (playlist_id_dict,),
             'kwargs': {'defer_cache': True},
-            'thread': None,
             'updater': update_playlist_infos,
             'upd_args': (
                 provider,
@@ -305,14 +301,13 @@ def _process_list_response(provider, context, json_data, item_filter):
                 channel_items_dict,
             ),
             'upd_kwargs': {'data': None},
-            'complete': False,
-            'defer': False,
+            'deferred': False,
+            'depends_on': None,
         },
         3: {
             'fetcher': resource_manager.get_channels,
             'args': (channel_id_dict,),
             'kwargs': {'defer_cache': True},
-            'thread': None,
             'updater': update_channel_infos,
             'upd_args': (
                 provider,
@@ -322,8 +317,8 @@ def _process_list_response(provider, context, json_data, item_filter):
                 channel_items_dict,
             ),
             'upd_kwargs': {'data': None},
-            'complete': False,
-            'defer': False,
+            'deferred': False,
+            'depends_on': None,
         },
         4: {
             'fetcher': resource_manager.get_fanarts,
@@ -332,7 +327,6 @@ def _process_list_response(provider, context, json_data, item_filter):
                 'force': bool(channel_id_dict or playlist_id_dict),
                 'defer_cache': True,
             },
-            'thread': None,
             'updater': update_fanarts,
             'upd_args': (
                 provider,
@@ -340,19 +334,18 @@ def _process_list_response(provider, context, json_data, item_filter):
                 channel_items_dict,
             ),
             'upd_kwargs': {'data': None},
-            'complete': False,
-            'defer': True,
+            'deferred': True,
+            'depends_on': None,
         },
         5: {
             'fetcher': resource_manager.cache_data,
             'args': (),
             'kwargs': {},
-            'thread': None,
             'updater': None,
             'upd_args': (),
             'upd_kwargs': {},
-            'complete': False,
-            'defer': 4,
+            'deferred': True,
+            'depends_on': 4,
         },
     }
 
@@ -365,45 +358,35 @@ def _process_list_response(provider, context, json_data, item_filter):
         resource['upd_kwargs']['data'] = data
         resource['updater'](*resource['upd_args'], **resource['upd_kwargs'])
 
-    remaining = len(resources)
-    deferred = sum(1 for resource in resources.values() if resource['defer'])
-    iterator = iter(resources.values())
+    thread_pool = context.get_thread_pool()
+    remaining = dict(resources)
     while remaining:
-        try:
-            resource = next(iterator)
-        except StopIteration:
-            iterator = iter(resources.values())
-            resource = next(iterator)
-
-        if resource['complete']:
-            continue
-
-        defer = resource['defer']
-        if defer:
-            if remaining > deferred:
+        # Deferred resources wait until all resources that are not deferred
+        # have been processed. Resources also wait until the resource they
+        # depend on, if any, has been processed.
+        waiting = any(not resource['deferred']
+                      for resource in remaining.values())
+        blocked = set(remaining)
+        tasks = []
+        for key, resource in list(remaining.items()):
+            if resource['deferred'] and waiting:
                 continue
-            if defer in resources and not resources[defer]['complete']:
+            if resource['depends_on'] in blocked:
                 continue
-            resource['defer'] = False
+            del remaining[key]
 
-        args = resource['args']
-        if args and not args[0]:
-            resource['complete'] = True
-            remaining -= 1
-            continue
-
-        thread = resource['thread']
-        if thread:
-            thread.join(5)
-            if not thread.is_alive():
-                resource['thread'] = None
-                resource['complete'] = True
-                remaining -= 1
-        else:
-            thread = Thread(target=_fetch, args=(resource,))
-            thread.daemon = True
-            thread.start()
-            resource['thread'] = thread
+            args = resource['args']
+            if args and not args[0]:
+                continue
+            tasks.append(thread_pool.submit(_fetch, resource))
+
+        thread_pool.wait(tasks)
+        for task in tasks:
+            try:
+                task.result()
+            except Exception as exc:
+                context.log_error('_process_list_response error: |{exc}|'
+                                  .format(exc=exc))
 
     return result
 
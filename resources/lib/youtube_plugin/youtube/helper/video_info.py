@@ -11,14 +11,14 @@
 from __future__ import absolute_import, division, unicode_literals
 
 import json
-import os
 import random
 import re
+from collections import deque
+from hashlib import md5
+from threading import Event
+from time import time
 from traceback import format_stack
 
-from .ratebypass import ratebypass
-from .signature.cipher import Cipher
-from .subtitles import Subtitles
 from .utils import THUMB_TYPES
 from ..client.request_client import YouTubeRequestClient
 from ..youtube_exceptions import InvalidJSON, YouTubeException
@@ -30,15 +30,19 @@ from ...kodion.compatibility import (
     urlencode,
     urljoin,
     urlsplit,
-    xbmcvfs,
 )
-from ...kodion.constants import PATHS, TEMP_PATH
-from ...kodion.network import get_connect_address
-from ...kodion.utils import make_dirs, redact_ip_from_url
+from ...kodion.constants import PATHS, PLAYER_CLIENT_STATS
+from ...kodion.network import get_connect_address, store_manifest
+from ...kodion.utils import redact_ip_from_url
 
 
 class VideoInfo(YouTubeRequestClient):
-    BASE_PATH = make_dirs(TEMP_PATH)
+    EXPIRE_RE = re.compile(r'[?&/]expire[=/](?P<expire>\d+)')
+    PLAYER_URL = 'https://www.youtube.com/youtubei/v1/player'
+
+    # Throttling parameter calculators, keyed by a hash of the URL of the
+    # player JavaScript they were extracted from, shared by all instances
+    _n_calculators = {}
 
     FORMAT = {
         # === Non-DASH ===
@@ -662,15 +666,19 @@ class VideoInfo(YouTubeRequestClient):
 
     def __init__(self, context, access_token='', **kwargs):
         self.video_id = None
+        self.expires = None
         self._context = context
         self._language_base = kwargs.get('language', 'en_US')[0:2]
         self._access_token = access_token
         self._player_js = None
+        self._player_js_url = None
         self._calculate_n = True
         self._cipher = None
 
         self._selected_client = None
-        client_selection = context.get_settings().client_selection()
+        settings = context.get_settings()
+        client_selection = settings.client_selection()
+        self._race_clients = settings.client_race()
 
         # Default client selection uses the Android or iOS client as the first
         # option to ensure that the age gate setting is enforced, regardless of
@@ -836,6 +844,33 @@ class VideoInfo(YouTubeRequestClient):
         self.video_id = video_id
         return self._get_video_info()
 
+    def _get_expiry(self, streaming_data):
+        """
+        Returns the time, in seconds since the epoch, at which the earliest
+        expiring stream URL will expire, as given by its expire parameter
+        """
+        urls = [
+            streaming_data.get('dashManifestUrl'),
+            streaming_data.get('hlsManifestUrl'),
+        ]
+        urls.extend(
+            fmt.get('url') or unquote(fmt.get('signatureCipher', ''))
+            for fmt in (streaming_data.get('formats', [])
+                        + streaming_data.get('adaptiveFormats', []))
+        )
+        expiry = [
+            int(match.group('expire'))
+            for match in map(self.EXPIRE_RE.search, filter(None, urls))
+            if match
+        ]
+        if expiry:
+            return min(expiry)
+
+        expires_in = streaming_data.get('expiresInSeconds')
+        if expires_in:
+            return int(time()) + int(expires_in)
+        return None
+
     def _get_player_page(self, client_name='web', embed=False):
         if embed:
             url = 'https://www.youtube.com/embed/{0}'.format(self.video_id)
@@ -894,7 +929,7 @@ class VideoInfo(YouTubeRequestClient):
             return json.loads(found.group(1))
         return None
 
-    def _get_player_js(self):
+    def _get_player_js_url(self):
         data_cache = self._context.get_data_cache()
         cached = data_cache.get_item('player_js_url', data_cache.ONE_HOUR * 4)
         cached = cached and cached.get('url', '')
@@ -919,10 +954,18 @@ class VideoInfo(YouTubeRequestClient):
 
         js_url = self._normalize_url(js_url)
         data_cache.set_item('player_js_url', {'url': js_url})
+        self._player_js_url = js_url
+        return js_url
 
-        js_cache_key = quote(js_url)
-        cached = data_cache.get_item(js_cache_key, data_cache.ONE_HOUR * 4)
-        cached = cached and cached.get('js')
+    def _get_player_js(self):
+        js_url = self._player_js_url or self._get_player_js_url()
+        if not js_url:
+            return ''
+
+        # The player JavaScript URL includes the player version, so the
+        # stored JavaScript remains valid for as long as the URL is used
+        data_cache = self._context.get_data_cache()
+        cached = data_cache.get_blob(js_url)
         if cached:
             return cached
 
@@ -945,9 +988,45 @@ class VideoInfo(YouTubeRequestClient):
         if not result:
             return ''
 
-        data_cache.set_item(js_cache_key, {'js': result})
+        data_cache.set_blob(js_url, result)
         return result
 
+    def _get_n_calculator(self):
+        js_url = self._player_js_url or self._get_player_js_url()
+        if not js_url:
+            return None
+        key = md5(js_url.encode('utf-8')).hexdigest()
+
+        calculator = VideoInfo._n_calculators.get(key)
+        if calculator:
+            return calculator
+
+        function_cache = self._context.get_function_cache()
+        plan = function_cache.run(self._load_throttling_plan,
+                                  function_cache.ONE_WEEK,
+                                  key=key)
+        if not plan:
+            return None
+
+        from .ratebypass.ratebypass import CalculateN
+
+        calculator = CalculateN(plan=plan)
+        VideoInfo._n_calculators[key] = calculator
+        return calculator
+
+    def _load_throttling_plan(self, key):
+        """
+        Extracts the throttling plan from the player JavaScript. key identifies
+        the player JavaScript when caching the result, so that the JavaScript
+        is only loaded and parsed when a new player version is used.
+        """
+        self._player_js = self._player_js or self._get_player_js()
+        if not self._player_js:
+            return None
+        from .ratebypass.ratebypass import CalculateN
+
+        return CalculateN.get_throttling_plan(self._player_js)
+
     @staticmethod
     def _make_curl_headers(headers, cookies=None):
         output = []
@@ -1212,13 +1291,13 @@ class VideoInfo(YouTubeRequestClient):
         update_url = {}
 
         if self._calculate_n and 'n' in query:
-            self._player_js = self._player_js or self._get_player_js()
             if self._calculate_n is True:
                 self._context.log_debug('nsig detected')
-                self._calculate_n = ratebypass.CalculateN(self._player_js)
+                self._calculate_n = self._get_n_calculator()
 
             # Cipher n to get the updated value
-            new_n = self._calculate_n.calculate_n(query['n'])
+            new_n = (self._calculate_n
+                     and self._calculate_n.calculate_n(query['n']))
             if new_n:
                 new_query['n'] = new_n
                 new_query['ratebypass'] = 'yes'
@@ -1294,9 +1373,95 @@ class VideoInfo(YouTubeRequestClient):
             return result['simpleText']
         return None
 
-    def _get_video_info(self):
-        video_info_url = 'https://www.youtube.com/youtubei/v1/player'
+    def _request_player(self, client_name, client, cancelled=None):
+        if cancelled and cancelled.is_set():
+            return None
+
+        started = time()
+        result = self.request(
+            self.PLAYER_URL,
+            'POST',
+            response_hook=self._response_hook_json,
+            error_title='Player request failed',
+            error_hook=self._error_hook,
+            error_hook_kwargs={
+                'video_id': self.video_id,
+                'client': client_name,
+                'auth': bool(client.get('_access_token')),
+            },
+            **client
+        )
+        elapsed = time() - started
+
+        status = result.get('playabilityStatus', {}).get('status', '')
+        self._context.get_data_cache().merge_item(
+            PLAYER_CLIENT_STATS,
+            {client_name: [1, int(status.upper() == 'OK'), elapsed]},
+            self._merge_client_stats,
+            defer=True,
+        )
+        return result
+
+    def _get_player_responses(self, client_data):
+        """
+        Yields (client_name, client, result) of player requests made using each
+        of the prioritised clients, in order of priority.
+
+        If racing is enabled, requests using up to the configured number of
+        clients are made concurrently, ahead of the response currently being
+        checked. Queued requests are skipped once the generator is closed,
+        while responses of requests already in progress are discarded.
+        """
+        clients = [
+            (client_name, client)
+            for client_name, client in (
+                (client_name, self.build_client(client_name, client_data))
+                for client_name in self._prioritised_clients
+            )
+            if client
+        ]
+
+        if self._race_clients < 2 or len(clients) < 2:
+            for client_name, client in clients:
+                yield client_name, client, self._request_player(client_name,
+                                                                client)
+            return
 
+        thread_pool = self._context.get_thread_pool()
+        cancelled = Event()
+        queued = iter(clients)
+        tasks = deque()
+        try:
+            for client_name, client in clients:
+                while len(tasks) < self._race_clients:
+                    next_client = next(queued, None)
+                    if not next_client:
+                        break
+                    tasks.append(thread_pool.submit(self._request_player,
+                                                    *next_client,
+                                                    cancelled=cancelled))
+                task = tasks.popleft()
+                # runs this task in the calling thread if not yet started by a
+                # worker, without running the requests of other queued clients
+                thread_pool.wait((task,))
+                yield client_name, client, task.result()
+        finally:
+            cancelled.set()
+
+    @staticmethod
+    def _merge_client_stats(stored_stats, client_stats):
+        """
+        Adds the number of requests, successful responses, and total response
+        time of each client used, to the stored stats
+        """
+        for client_name, stats in client_stats.items():
+            stored = stored_stats.get(client_name)
+            if stored:
+                stats = [value + stored[idx] for idx, value in enumerate(stats)]
+            stored_stats[client_name] = stats
+        return stored_stats
+
+    def _get_video_info(self):
         _settings = self._context.get_settings()
         video_id = self.video_id
         client_name = reason = status = None
@@ -1314,7 +1479,8 @@ class VideoInfo(YouTubeRequestClient):
             client_data['_access_token'] = self._access_token
 
         while 1:
-            for client_name in self._prioritised_clients:
+            responses = self._get_player_responses(client_data)
+            for client_name, next_client, result in responses:
                 if status and status != 'OK':
                     self._context.log_warning(
                         'Failed to retrieve video info - '
@@ -1327,24 +1493,7 @@ class VideoInfo(YouTubeRequestClient):
                             reason or 'UNKNOWN',
                         )
                     )
-                client = self.build_client(client_name, client_data)
-                if not client:
-                    continue
-
-                result = self.request(
-                    video_info_url,
-                    'POST',
-                    response_hook=self._response_hook_json,
-                    error_title='Player request failed',
-                    error_hook=self._error_hook,
-                    error_hook_kwargs={
-                        'video_id': video_id,
-                        'client': client_name,
-                        'auth': bool(client.get('_access_token')),
-                    },
-                    **client
-                )
-
+                client = next_client
                 video_details = result.get('videoDetails', {})
                 playability_status = result.get('playabilityStatus', {})
                 status = playability_status.get('status', '').upper()
@@ -1398,6 +1547,7 @@ class VideoInfo(YouTubeRequestClient):
                     del client_data['_access_token']
                     continue
             # Otherwise skip retrying clients without Authorization header
+            responses.close()
             break
 
         if status != 'OK':
@@ -1446,6 +1596,7 @@ class VideoInfo(YouTubeRequestClient):
         else:
             live_dvr = False
             thumb_suffix = ''
+        self.expires = None if is_live else self._get_expiry(streaming_data)
 
         meta_info = {
             'video': {
@@ -1541,8 +1692,12 @@ class VideoInfo(YouTubeRequestClient):
         if any(True for fmt in all_fmts
                if fmt and 'url' not in fmt and 'signatureCipher' in fmt):
             self._context.log_debug('signatureCipher detected')
+            from .signature.cipher import Cipher
+
             self._player_js = self._get_player_js()
-            self._cipher = Cipher(self._context, javascript=self._player_js)
+            self._cipher = Cipher(self._context,
+                                  javascript=self._player_js,
+                                  url=self._player_js_url)
 
         if 'dashManifestUrl' in streaming_data:
             manifest_url = streaming_data['dashManifestUrl']
@@ -1568,6 +1723,8 @@ class VideoInfo(YouTubeRequestClient):
                 is_live, meta_info, client['headers'], playback_stats
             ))
 
+        from .subtitles import Subtitles
+
         subtitles = Subtitles(self._context, video_id)
         query_subtitles = client.get('_query_subtitles')
         if (not is_live or live_dvr) and (
@@ -1579,7 +1736,7 @@ class VideoInfo(YouTubeRequestClient):
                 if not caption_client:
                     continue
                 result = self.request(
-                    video_info_url,
+                    self.PLAYER_URL,
                     'POST',
                     response_hook=self._response_hook_json,
                     error_title='Caption player request failed',
@@ -1949,11 +2106,6 @@ class VideoInfo(YouTubeRequestClient):
         if not video_data or not audio_data:
             return None, None
 
-        if not self.BASE_PATH:
-            self._context.log_error('VideoInfo._generate_mpd_manifest - '
-                                    'unable to access temp directory')
-            return None, None
-
         def _filter_group(previous_group, previous_stream, item):
             skip_group = True
             if not item:
@@ -2232,22 +2384,7 @@ class VideoInfo(YouTubeRequestClient):
         if roles.difference({'', 'main', 'dub'}):
             main_stream['multi_audio'] = True
 
-        filename = '.'.join((self.video_id, 'mpd'))
-        filepath = os.path.join(self.BASE_PATH, filename)
-        try:
-            with xbmcvfs.File(filepath, 'w') as mpd_file:
-                success = mpd_file.write(output)
-        except (IOError, OSError):
-            self._context.log_error('VideoInfo._generate_mpd_manifest - '
-                                    'file write failed for: {file}'
-                                    .format(file=filepath))
-            success = False
-        if success:
-            address, port = get_connect_address(self._context)
-            return 'http://{address}:{port}{path}{file}'.format(
-                address=address,
-                port=port,
-                path=PATHS.MPD,
-                file=filename,
-            ), main_stream
+        manifest_url = store_manifest(self._context, self.video_id, output)
+        if manifest_url:
+            return manifest_url, main_stream
         return None, None
@@ -180,21 +180,19 @@ def _play_playlist(provider, context):
             context.localize('please_wait'),
             background=True
     ) as progress_dialog:
-        json_data = resource_manager.get_playlist_items(playlist_ids)
-
-        total = sum(len(chunk.get('items', [])) for chunk in json_data.values())
-        progress_dialog.set_total(total)
-        progress_dialog.update(
-            steps=0,
-            text='{wait} {current}/{total}'.format(
-                wait=context.localize('please_wait'),
-                current=0,
-                total=total
-            )
-        )
+        json_data = resource_manager.get_playlist_items(playlist_ids,
+                                                        stream=True)
+
+        # start the loop and fill the list with video items as each page of
+        # the playlists is received
+        total = 0
+        for batch_id, chunk in json_data:
+            if not batch_id[1]:
+                total += chunk.get('pageInfo', {}).get('totalResults', 0)
+            total = max(total, len(videos) + len(chunk.get('items', [])))
+            if total != progress_dialog.get_total():
+                progress_dialog.set_total(total)
 
-        # start the loop and fill the list with video items
-        for chunk in json_data.values():
             result = v3.response_to_items(provider,
                                           context,
                                           chunk,
@@ -14,6 +14,7 @@ import atexit
 import json
 import re
 from base64 import b64decode
+from threading import RLock
 from weakref import proxy
 
 from .client import APICheck, YouTube
@@ -23,9 +24,7 @@ from .helper import (
     UrlToItemConverter,
     v3,
     yt_login,
-    yt_play,
     yt_playlist,
-    yt_setup_wizard,
     yt_specials,
     yt_subscriptions,
     yt_video,
@@ -57,6 +56,9 @@ class Provider(AbstractProvider):
         self._client = None
         self._api_check = None
         self._logged_in = False
+        # the client is used by the plugin, and by the service loop, the
+        # player monitor and thread pool workers in the service process
+        self._client_lock = RLock()
 
         self.on_video_x = self.register_path(
             '^/video/(?P<method>[^/]+)/?$',
@@ -70,7 +72,7 @@ class Provider(AbstractProvider):
 
         self.register_path(
             '^/play/?$',
-            yt_play.process,
+            self.on_play,
         )
 
         self.register_path(
@@ -87,6 +89,8 @@ class Provider(AbstractProvider):
 
     @staticmethod
     def get_wizard_steps():
+        from .helper import yt_setup_wizard
+
         steps = [
             yt_setup_wizard.process_default_settings,
             yt_setup_wizard.process_performance_settings,
@@ -168,10 +172,15 @@ class Provider(AbstractProvider):
         return {}
 
     def reset_client(self):
-        self._client = None
-        self._api_check = None
+        with self._client_lock:
+            self._client = None
+            self._api_check = None
 
     def get_client(self, context):
+        with self._client_lock:
+            return self._get_client(context)
+
+    def _get_client(self, context):
         access_manager = context.get_access_manager()
 
         if not self._api_check:
@@ -309,13 +318,15 @@ class Provider(AbstractProvider):
         return self._client
 
     def get_resource_manager(self, context):
-        resource_manager = self._resource_manager
-        if not resource_manager or resource_manager.context_changed(context):
-            new_resource_manager = ResourceManager(proxy(self), context)
-            if not resource_manager:
-                self._resource_manager = new_resource_manager
-            return new_resource_manager
-        return resource_manager
+        with self._client_lock:
+            resource_manager = self._resource_manager
+            if (not resource_manager
+                    or resource_manager.context_changed(context)):
+                new_resource_manager = ResourceManager(proxy(self), context)
+                if not resource_manager:
+                    self._resource_manager = new_resource_manager
+                return new_resource_manager
+            return resource_manager
 
     @AbstractProvider.register_path('^/uri2addon/?$')
     @staticmethod
@@ -703,6 +714,14 @@ class Provider(AbstractProvider):
            streams. 1 (default) for first live stream
     """
 
+    @staticmethod
+    def on_play(provider, context, re_match):
+        # playback helpers, and the stream resolving modules they use, are
+        # only imported when a video is actually played
+        from .helper import yt_play
+
+        return yt_play.process(provider, context, re_match=re_match)
+
     @AbstractProvider.register_path('^/users/(?P<action>[^/]+)/?$')
     @staticmethod
     def on_users(re_match, **_kwargs):
@@ -822,18 +841,34 @@ class Provider(AbstractProvider):
                 )
                 result.append(live_item)
 
+        client = self.get_client(context)
         function_cache = context.get_function_cache()
-        json_data = function_cache.run(self.get_client(context).search,
-                                       function_cache.ONE_MINUTE * 10,
-                                       _refresh=params.get('refresh'),
-                                       q=search_text,
-                                       search_type=search_type,
-                                       event_type=event_type,
-                                       safe_search=safe_search,
-                                       page_token=page_token,
-                                       channel_id=channel_id,
-                                       order=order,
-                                       location=location)
+        search_params = {
+            'q': search_text,
+            'search_type': search_type,
+            'event_type': event_type,
+            'safe_search': safe_search,
+            'page_token': page_token,
+            'channel_id': channel_id,
+            'order': order,
+            'location': location,
+        }
+        # Searches are expensive, so use previous results, regardless of age,
+        # rather than the remaining quota
+        if function_cache.is_enabled() and client.is_quota_low('search'):
+            json_data = function_cache.get_result(client.search,
+                                                  **search_params)
+            if json_data:
+                context.get_ui().show_notification(
+                    context.localize('quota.low')
+                )
+        else:
+            json_data = None
+        if not json_data:
+            json_data = function_cache.run(client.search,
+                                           function_cache.ONE_MINUTE * 10,
+                                           _refresh=params.get('refresh'),
+                                           **search_params)
         if not json_data:
             return False
         result.extend(v3.response_to_items(